@@ -1,22 +1,176 @@
 
 import datetime
-import os
-import time
+import json
+import logging
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-import requests
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from utils import DataProcessor, CacheManager
-from config import Config
+from cache_backends import create_cache_backend
+from stock_data import StockData, is_missing
+from config import get_config
+from prompts import (
+    get_prompt_profile, COMPARISON_SYSTEM, COMPARISON_QUERY, COMPARISON_METRICS_BLOCK,
+    STRUCTURED_REPORT_SYSTEM, STRUCTURED_REPORT_QUERY
+)
+from structured_report import StructuredReport, parse_report, render_markdown
+from price_history import PriceHistoryStore
+from screener import MetricsSnapshot
+from popularity import RequestCounter
+from report_index import ReportIndex, extract_rating, report_key
+from routing import ModelRouter
+from key_pool import ApiKeyPool, CLIENT_CLOSED_REQUEST
+from deadline import Deadline, DeadlineExceeded
+from tasks import SharedTasks
+from trading_calendar import TradingCalendar, exchange_for
+from instruments import instrument_id, is_indian_symbol, resolve_ticker
+from indicators import compute_indicators, format_indicators_for_prompt, format_indicators_markdown
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for report index snapshots written by other processes
+REPORT_INDEX_REFRESH_INTERVAL = 60.0
+
+class StreamedCompletion:
+    """Response-like result of a streamed completion, shaped like the non-streamed JSON"""
+    
+    def __init__(self, status_code, headers, content, citations=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.citations = citations or []
+    
+    def json(self):
+        return {'choices': [{'message': {'content': self.content}}], 'citations': self.citations}
 
 class StockSentimentAnalyzer:
     def __init__(self, perplexity_api_key):
         self.api_key = perplexity_api_key
         self.base_url = "https://api.perplexity.ai/chat/completions"
-        self.config = Config()
-        self.cache = CacheManager()
+        self.config = get_config()
+        self.cache = CacheManager(self.config.cache_max_size, create_cache_backend(self.config))
         self.data_processor = DataProcessor()
+        self.prompts = get_prompt_profile(self.config.prompt_profile)
+        self.price_history = PriceHistoryStore(self.config.price_history_dir)
+        self.snapshot = MetricsSnapshot()
+        self.popularity = RequestCounter(self.cache)
+        # Search index over generated reports, loaded from its snapshot on first use
+        self._report_index = None
+        self._report_index_checked = 0.0
+        self._report_index_lock = threading.Lock()
+        self.router = ModelRouter(self.config.model_routes, self.config.latency_targets)
+        self.calendar = TradingCalendar.from_file(self.config.market_holidays_file)
+        self.key_pool = ApiKeyPool(
+            [key for key in [perplexity_api_key] + self.config.perplexity_api_keys if key],
+            requests_per_minute=self.config.api_key_rpm
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.config.analysis_workers, thread_name_prefix="analysis")
+        self.tasks = SharedTasks()
+    
+    def _post_completion(self, call_type, messages, deadline=None):
+        """POST a chat completion on the model routed for this call type and record its latency.
+        
+        Calls are spread over the API key pool; a 429 is retried once per
+        remaining key while the deadline allows.
+        """
+        route = self.router.choose(call_type)
+        payload = {
+            "model": route['model'],
+            "messages": messages
+        }
+        if route.get('max_tokens'):
+            payload["max_tokens"] = route['max_tokens']
+        
+        # With a deadline the completion is streamed, so cancelling the
+        # deadline can close the connection while the answer is generated
+        streaming = deadline is not None
+        if streaming:
+            payload["stream"] = True
+        
+        import requests  # Deferred so cold starts don't pay for it before the first call
+        tried = ()
+        while True:
+            # The request's deadline caps the per-call-type timeout; it raises
+            # once cancelled or expired, so check it before taking a key
+            timeout = self.router.timeout_for(call_type)
+            if deadline is not None:
+                timeout = deadline.timeout(timeout)
+            
+            key = self.key_pool.acquire(exclude=tried, deadline=deadline)
+            tried += (key,)
+            headers = {
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json"
+            }
+            
+            start = time.perf_counter()
+            try:
+                response = requests.post(self.base_url, json=payload, headers=headers, timeout=timeout, stream=streaming)
+                if streaming and response.status_code == 200:
+                    response = self._read_stream(response, deadline)
+            except DeadlineExceeded:
+                # Cancelled or out of time: abandoned by this request, which says nothing about the key or model
+                self.key_pool.release(key, time.perf_counter() - start, CLIENT_CLOSED_REQUEST)
+                raise
+            except requests.exceptions.Timeout:
+                # A timeout cut short by the request's own deadline is abandoned too
+                if deadline is not None and deadline.expired:
+                    self.key_pool.release(key, time.perf_counter() - start, CLIENT_CLOSED_REQUEST)
+                    raise
+                self.key_pool.release(key, time.perf_counter() - start, None)
+                self.router.record(call_type, route['model'], time.perf_counter() - start, ok=False)
+                raise
+            except Exception:
+                self.key_pool.release(key, time.perf_counter() - start, None)
+                self.router.record(call_type, route['model'], time.perf_counter() - start, ok=False)
+                raise
+            latency = time.perf_counter() - start
+            self.key_pool.release(key, latency, response.status_code, response.headers.get('Retry-After'))
+            
+            if response.status_code == 429 and len(tried) < len(self.key_pool) and not (deadline and deadline.expired):
+                continue
+            # Rate limiting says nothing about the model's latency
+            if response.status_code != 429:
+                self.router.record(call_type, route['model'], latency, ok=response.status_code == 200)
+            return response
     
-    def fetch_stock_metrics(self, ticker):
+    def _read_stream(self, response, deadline):
+        """Collect a streamed completion; cancelling the deadline closes the connection mid-stream"""
+        unregister = deadline.on_cancel(response.close)
+        parts = []
+        citations = None
+        complete = False
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if deadline.expired:
+                    break
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    complete = True
+                    break
+                chunk = json.loads(data)
+                citations = chunk.get('citations') or citations
+                choice = chunk['choices'][0]
+                parts.append((choice.get('delta') or {}).get('content') or '')
+            else:
+                complete = True
+        except Exception:
+            # Closing the response from another thread surfaces as a read error
+            if not deadline.expired:
+                raise
+        finally:
+            unregister()
+            response.close()
+        if not complete:
+            deadline.timeout()  # Raises Cancelled or DeadlineExceeded
+        return StreamedCompletion(response.status_code, response.headers, ''.join(parts), citations)
+    
+    def fetch_stock_metrics(self, ticker, deadline=None):
         """Dedicated function to fetch stock metrics using Perplexity API only"""
         try:
             # Determine if this is an Indian stock
@@ -24,42 +178,25 @@ class StockSentimentAnalyzer:
             currency_symbol = "₹" if is_indian_stock else "$"
             currency_name = "INR" if is_indian_stock else "USD"
             
-            # Detailed query for stock metrics with appropriate currency
-            metrics_query = f"""
-            Get the exact current stock price, target price, PE ratio, and recent price change percentage for {ticker}.
-            
-            Please provide the information in this exact format:
-            Current Price: {currency_symbol}X.XX
-            Target Price: {currency_symbol}X.XX (or N/A if not available)
-            PE Ratio: X.XX (or N/A if not available)
-            Price Change: +/-X.XX%
-            
-            IMPORTANT: 
-            - If this is an Indian stock (like RELIANCE, TCS, INFY, HDFCBANK, etc.), show prices in Indian Rupees (₹)
-            - If this is a US/international stock, show prices in US Dollars ($)
-            - Source data from reliable financial sources like Yahoo Finance, Bloomberg, MarketWatch, Google Finance, or Moneycontrol for Indian stocks
-            - Be precise with the numbers and include the correct currency symbol
-            """
+            # Metrics prompt with the appropriate currency, from the pre-normalized templates
+            metrics_query = self.prompts.metrics_query.format(
+                ticker=ticker,
+                currency_symbol=currency_symbol
+            )
             
-            payload = {
-                "model": "sonar",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": f"You are a precise financial data assistant. Extract exact stock metrics from reliable financial sources. For Indian stocks, use ₹ (INR), for US/international stocks use $ (USD). Always format percentages with % symbol. Be accurate and concise. This stock is from {'India' if is_indian_stock else 'US/International'} market."
-                    },
-                    {
-                        "role": "user",
-                        "content": metrics_query
-                    }
-                ]
-            }
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(self.base_url, json=payload, headers=headers)
+            messages = [
+                {
+                    "role": "system",
+                    "content": self.prompts.metrics_system.format(
+                        market='India' if is_indian_stock else 'US/International'
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": metrics_query
+                }
+            ]
+            response = self._post_completion("metrics", messages, deadline=deadline)
             
             if response.status_code != 200:
                 st.warning(f"Failed to fetch stock metrics: {response.status_code}")
@@ -72,35 +209,37 @@ class StockSentimentAnalyzer:
             return self._parse_metrics_response(metrics_text, is_indian_stock)
             
         except Exception as e:
-            st.warning(f"Error fetching stock metrics: {str(e)}")
+            # A cancelled fetch belongs to a script run that has been superseded
+            if not (deadline and deadline.cancelled):
+                st.warning(f"Error fetching stock metrics: {str(e)}")
             return self._get_empty_stock_data()
     
     def _parse_metrics_response(self, text, is_indian_stock=False):
         """Parse the structured metrics response from Perplexity"""
         stock_data = self._get_empty_stock_data()
-        stock_data['is_indian'] = is_indian_stock
+        stock_data.is_indian = is_indian_stock
         
         try:
             # Extract current price (support both $ and ₹)
             currency_pattern = r'₹' if is_indian_stock else r'\$'
             current_price_match = re.search(rf'Current Price:\s*[{currency_pattern}$₹]\s*(\d+\.?\d*)', text, re.IGNORECASE)
             if current_price_match:
-                stock_data['current_price'] = float(current_price_match.group(1))
+                stock_data.current_price = float(current_price_match.group(1))
             
             # Extract target price
             target_price_match = re.search(rf'Target Price:\s*[{currency_pattern}$₹]\s*(\d+\.?\d*)', text, re.IGNORECASE)
             if target_price_match:
-                stock_data['target_price'] = float(target_price_match.group(1))
+                stock_data.target_price = float(target_price_match.group(1))
             
             # Extract PE ratio
             pe_ratio_match = re.search(r'PE Ratio:\s*(\d+\.?\d*)', text, re.IGNORECASE)
             if pe_ratio_match:
-                stock_data['pe_ratio'] = float(pe_ratio_match.group(1))
+                stock_data.pe_ratio = float(pe_ratio_match.group(1))
             
             # Extract price change
             change_match = re.search(r'Price Change:\s*([+-]?\d+\.?\d*)%', text, re.IGNORECASE)
             if change_match:
-                stock_data['price_change'] = float(change_match.group(1))
+                stock_data.price_change = float(change_match.group(1))
                 
         except Exception as e:
             st.warning(f"Error parsing metrics: {str(e)}")
@@ -108,174 +247,412 @@ class StockSentimentAnalyzer:
         return stock_data
     
     def _get_empty_stock_data(self):
-        """Return empty stock data structure"""
-        return {
-            'current_price': 0,
-            'target_price': 0,
-            'pe_ratio': 0,
-            'price_change': 0,
-            'is_indian': False
-        }
+        """Return empty stock data record; every metric starts out missing"""
+        return StockData()
     
     def _is_indian_stock(self, ticker):
         """Determine if a stock ticker is from Indian market"""
-        # Common Indian stock tickers
-        indian_stocks = {
-            # Major Indian companies
-            'RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'HINDUNILVR', 'ICICIBANK', 'ITC', 
-            'SBIN', 'BHARTIARTL', 'KOTAKBANK', 'LT', 'ASIANPAINT', 'AXISBANK', 'MARUTI',
-            'BAJFINANCE', 'HCLTECH', 'WIPRO', 'ULTRACEMCO', 'DMART', 'BAJAJFINSV',
-            'TITAN', 'NESTLEIND', 'POWERGRID', 'TATAMOTORS', 'TECHM', 'SUNPHARMA',
-            'JSWSTEEL', 'TATASTEEL', 'INDUSINDBK', 'ADANIENT', 'BPCL', 'GRASIM',
-            'COALINDIA', 'ONGC', 'NTPC', 'DRREDDY', 'APOLLOHOSP', 'BAJAJ-AUTO',
-            'CIPLA', 'EICHERMOT', 'DIVISLAB', 'HEROMOTOCO', 'BRITANNIA', 'SHREECEM',
-            'PIDILITIND', 'GODREJCP', 'BERGEPAINT', 'DABUR', 'AMBUJACEM', 'BANDHANBNK',
-            'MCDOWELL-N', 'TATACONSUM', 'CHOLAFIN', 'GAIL', 'SIEMENS', 'DLF',
-            'ZEEL', 'VEDL', 'CADILAHC', 'LUPIN', 'MARICO', 'BIOCON', 'MUTHOOTFIN',
-            'PAGEIND', 'AUROPHARMA', 'TORNTPHARM', 'COLPAL', 'HDFCLIFE', 'SBILIFE',
-            'ICICIPRULI', 'BAJAJHLDNG', 'MINDTREE', 'MPHASIS', 'PERSISTENT'
-        }
-        
-        # Check if ticker matches Indian stock patterns
-        ticker_upper = ticker.upper()
-        
-        # Direct match with known Indian stocks
-        if ticker_upper in indian_stocks:
-            return True
-            
-        # Check for .NS or .BO suffixes (NSE/BSE)
-        if ticker_upper.endswith('.NS') or ticker_upper.endswith('.BO'):
-            return True
-            
-        # Check for Indian sector ETFs or mutual funds
-        if any(suffix in ticker_upper for suffix in ['.NSE', '.BSE', 'NIFTY', 'SENSEX']):
-            return True
-            
-        return False
+        return is_indian_symbol(ticker)
     
-    def fetch_comprehensive_analysis(self, ticker):
-        """Fetch comprehensive stock analysis using Perplexity API only"""
+    def fetch_comprehensive_analysis(self, ticker, deadline=None):
+        """Fetch comprehensive stock analysis using Perplexity API only.
+        
+        With REPORT_FORMAT=json the model returns the report's fields as a
+        compact JSON object, which is rendered to markdown locally.
+        """
         try:
-            analysis_query = f"""
-            Provide a comprehensive stock analysis for {ticker} including:
+            structured = self.config.report_format == "json"
+            if structured:
+                analysis_query = STRUCTURED_REPORT_QUERY.format(ticker=ticker)
+                system_instruction = STRUCTURED_REPORT_SYSTEM
+            else:
+                analysis_query = self.prompts.analysis_query.format(ticker=ticker)
+                system_instruction = self._get_enhanced_system_instruction()
             
-            1. Recent news and developments (last 7 days)
-            2. Earnings and financial performance
-            3. Technical analysis and price trends
-            4. Risk factors and market sentiment
-            5. Investment recommendation with reasoning
+            # Hard technical numbers from local price history, when available
+            technicals = self._get_local_technicals(ticker)
+            currency_symbol = "₹" if self._is_indian_stock(ticker) else "$"
+            render_technicals = bool(technicals) and self.config.technicals_mode == "render"
+            if technicals and self.config.technicals_mode == "prompt":
+                analysis_query += (
+                    "\n\n" + format_indicators_for_prompt(technicals, currency_symbol)
+                    + ("\nUse these figures for the technicals fields." if structured
+                       else "\nUse these figures for the Technical Analysis section.")
+                )
+            elif render_technicals:
+                analysis_query += ("\n\nSet technicals to null; they are computed separately." if structured
+                                   else "\n\nOmit the Technical Analysis section; it is computed separately.")
             
-            Include specific data points, percentages, and cite reliable financial sources.
-            Format your response with clear headers and bullet points for readability.
-            """
-            
-            payload = {
-                "model": "sonar",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": self._get_enhanced_system_instruction()
-                    },
-                    {
-                        "role": "user",
-                        "content": analysis_query
-                    }
-                ]
-            }
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(self.base_url, json=payload, headers=headers)
+            messages = [
+                {
+                    "role": "system",
+                    "content": system_instruction
+                },
+                {
+                    "role": "user",
+                    "content": analysis_query
+                }
+            ]
+            response = self._post_completion("report", messages, deadline=deadline)
             
             if response.status_code != 200:
                 return f"Error fetching analysis: API request failed with status {response.status_code}"
             
             response_data = response.json()
-            return response_data['choices'][0]['message']['content']
+            analysis = response_data['choices'][0]['message']['content']
+            if structured:
+                analysis = self._render_structured_report(
+                    ticker, analysis, response_data.get('citations'), currency_symbol, not render_technicals
+                )
+            
+            if render_technicals:
+                analysis = self._insert_technicals_section(
+                    analysis, format_indicators_markdown(technicals, currency_symbol)
+                )
+            return analysis
             
         except Exception as e:
             return f"Error fetching comprehensive analysis: {str(e)}"
     
-    def get_stock_data(self, ticker, max_retries=None):
-        """Get stock data using Perplexity API only - improved version"""
+    def _render_structured_report(self, ticker, content, citations, currency_symbol, with_technicals):
+        """Render a JSON report to markdown and cache its typed fields.
+        
+        A reply that is markdown after all is kept as is; one that is
+        unusable JSON becomes an error report, so it is never cached.
+        """
+        try:
+            report = parse_report(content)
+        except ValueError as e:
+            if '{' not in content and re.search(r'^##\s', content, re.MULTILINE):
+                return content
+            return f"Error fetching analysis: Unusable JSON report ({e})"
+        if citations and not report.citations:
+            report.citations = [url for url in citations if isinstance(url, str)][:10]
+        self.cache.set(f"report_fields_{ticker}", report.to_dict(), ttl=self.report_ttl(ticker))
+        return render_markdown(report, currency_symbol, with_technicals=with_technicals)
+    
+    def report_fields(self, ticker):
+        """Typed fields (rating, price levels, ...) of the last JSON-mode report of a ticker, or None"""
+        is_valid, result = resolve_ticker(ticker)
+        fields = self.cache.get(f"report_fields_{result}") if is_valid else None
+        return StructuredReport(**fields) if fields else None
+    
+    def _get_local_technicals(self, ticker):
+        """Compute technical indicators from local price history, or None if there is none"""
+        if self.config.technicals_mode == "off":
+            return None
+        return compute_indicators(self.price_history, [ticker]).get(ticker)
+    
+    def _insert_technicals_section(self, analysis, section):
+        """Place the locally rendered Technical Analysis section before Risk Assessment"""
+        match = re.search(r'^##\s*⚠️?\s*Risk Assessment', analysis, re.MULTILINE)
+        if match:
+            return analysis[:match.start()] + section + "\n" + analysis[match.start():]
+        return analysis.rstrip() + "\n\n" + section
+    
+    def get_stock_data(self, ticker, max_retries=None, deadline=None, refresh=False):
+        """Get stock data using Perplexity API only - improved version; refresh skips the cache read"""
         if max_retries is None:
             max_retries = self.config.max_retries
         
-        # Check cache first
-        cache_key = f"stock_data_{ticker}_{datetime.datetime.now().strftime('%Y-%m-%d-%H')}"
-        cached_data = self.cache.get(cache_key)
-        if cached_data:
-            return cached_data
-        
-        # Validate ticker
-        is_valid, result = self.data_processor.validate_ticker(ticker)
+        # Resolve aliases to the canonical instrument ID before any cache or network work
+        is_valid, result = resolve_ticker(ticker)
         if not is_valid:
             st.warning(f"Invalid ticker format: {result}")
             return None, []
+        ticker = result
         
-        ticker = result  # Use cleaned ticker
+        # Check cache first
+        cache_key = f"stock_data_{ticker}"
+        cached_data = None if refresh else self.cache.get(cache_key)
+        if cached_data:
+            # Shared backends also serve entries other processes fetched
+            self.snapshot.update(ticker, cached_data[0])
+            return cached_data
         
         # Use the dedicated function to fetch stock metrics
-        stock_data = self.fetch_stock_metrics(ticker)
+        stock_data = self.fetch_stock_metrics(ticker, deadline=deadline)
         
         # Create a simple result structure for compatibility
         results = [{"content": f"Stock data for {ticker}", "url": "perplexity_api"}]
         
-        # Cache the results
+        # Cache the results until the data can next change and keep the
+        # screener snapshot current; failed or timed-out fetches are not
+        # cached so the next request retries
         result_tuple = (stock_data, results)
-        self.cache.set(cache_key, result_tuple)
+        if stock_data.has_price:
+            self.cache.set(cache_key, result_tuple, ttl=self.market_data_ttl(ticker))
+            self.snapshot.update(ticker, stock_data)
         
         return result_tuple
     
+    def market_data_ttl(self, ticker):
+        """Seconds market data for a ticker stays valid: a few minutes in session, otherwise until the next open"""
+        exchange = exchange_for(self._is_indian_stock(ticker))
+        return self.calendar.cache_ttl(exchange, self.config.live_data_ttl)
+    
     def _extract_stock_metrics(self, results, stock_data):
         """Extract stock metrics using improved data processing"""
         for result in results:
             content = result.get('content', '').lower()
             
             # Extract current price
-            if not stock_data['current_price']:
+            if is_missing(stock_data.current_price):
                 price = self.data_processor.extract_price_from_text(content, self.config.currency_symbols)
                 if price:
-                    stock_data['current_price'] = price
+                    stock_data.current_price = price
             
             # Extract target price
-            if 'target' in content and not stock_data['target_price']:
+            if 'target' in content and is_missing(stock_data.target_price):
                 target_price = self.data_processor.extract_price_from_text(content, self.config.currency_symbols)
-                if target_price and target_price != stock_data['current_price']:
-                    stock_data['target_price'] = target_price
+                if target_price and target_price != stock_data.current_price:
+                    stock_data.target_price = target_price
             
             # Extract PE ratio
-            if not stock_data['pe_ratio']:
+            if is_missing(stock_data.pe_ratio):
                 pe_ratio = self.data_processor.extract_pe_ratio_from_text(content)
                 if pe_ratio:
-                    stock_data['pe_ratio'] = pe_ratio
+                    stock_data.pe_ratio = pe_ratio
             
             # Extract price change
-            if not stock_data['price_change']:
+            if is_missing(stock_data.price_change):
                 price_change = self.data_processor.extract_percentage_from_text(content)
                 if price_change is not None:
-                    stock_data['price_change'] = price_change
+                    stock_data.price_change = price_change
         
         return stock_data
 
-    def analyze_sentiment(self, ticker):
+    def get_report(self, ticker, deadline=None, refresh=False):
+        """Get the comprehensive report, cached per ticker (see report_is_fresh); refresh forces a new one"""
+        is_valid, result = resolve_ticker(ticker)
+        if not is_valid:
+            return f"Error fetching analysis: Invalid ticker format: {result}"
+        ticker = result
+        
+        cache_key = f"report_{ticker}"
+        cached = None if refresh else self.cache.get(cache_key)
+        if cached and self.report_is_fresh(ticker, cached[0]):
+            return cached[1]
+        
+        analysis = self.fetch_comprehensive_analysis(ticker, deadline=deadline)
+        if not self.is_error_report(analysis):
+            fetched_at = time.time()
+            self.cache.set(cache_key, (fetched_at, analysis), ttl=self.report_ttl(ticker))
+            self._index_report(ticker, fetched_at, analysis)
+        return analysis
+    
+    @property
+    def report_index(self):
+        """Full-text index over reports (see report_index.py), restored from its snapshot on first use
+        and merged in the background with snapshots other processes write"""
+        if self._report_index is None:
+            with self._report_index_lock:
+                if self._report_index is None:
+                    self._report_index = ReportIndex.open(self.config.report_index_path)
+                    self._report_index_checked = time.monotonic()
+        elif time.monotonic() - self._report_index_checked >= REPORT_INDEX_REFRESH_INTERVAL:
+            self._report_index_checked = time.monotonic()
+            self.executor.submit(self._maintain_report_index, self._report_index.refresh)
+        return self._report_index
+    
+    def _maintain_report_index(self, operation):
+        """Run a snapshot or refresh of the report index, logging failures"""
+        try:
+            operation(self.config.report_index_path)
+        except Exception as e:
+            logger.warning("Report index %s failed: %s", operation.__name__, e)
+    
+    def _index_report(self, ticker, fetched_at, analysis):
+        """Add a new report to the search index and snapshot the index every so many reports.
+        
+        The report is already cached, so indexing problems are logged rather
+        than failing the request.
+        """
+        try:
+            index = self.report_index
+            index.add(report_key(ticker, fetched_at), ticker, analysis, fetched_at, extract_rating(analysis))
+            if index.unsaved >= self.config.report_index_snapshot_every:
+                index.unsaved = 0
+                self.executor.submit(self._maintain_report_index, index.snapshot)
+        except Exception as e:
+            logger.warning("Could not index the report of %s: %s", ticker, e)
+    
+    def report_is_fresh(self, ticker, fetched_at):
+        """Whether a report is recent enough to serve: for report_max_age seconds, or, when written
+        while the exchange was closed, until report_max_age into the next session"""
+        max_age = self.config.report_max_age
+        if time.time() - fetched_at < max_age:
+            return True
+        exchange = exchange_for(self._is_indian_stock(ticker))
+        written = datetime.datetime.fromtimestamp(fetched_at, datetime.timezone.utc)
+        if self.calendar.is_open(exchange, written):
+            return False
+        return time.time() < self.calendar.next_open(exchange, written).timestamp() + max_age
+    
+    def report_ttl(self, ticker):
+        """Cache lifetime of a report written now; None keeps the backend default"""
+        exchange = exchange_for(self._is_indian_stock(ticker))
+        if self.calendar.is_open(exchange):
+            return None
+        # Keep off-hours reports until report_is_fresh stops serving them
+        return max(self.config.cache_ttl, self.calendar.seconds_until_open(exchange) + self.config.report_max_age)
+    
+    @staticmethod
+    def is_error_report(analysis):
+        """Whether fetch_comprehensive_analysis returned an error message instead of a report"""
+        return analysis.startswith("Error fetching")
+    
+    def cached_report(self, ticker):
+        """Return (fetched_at, report) for the last good report of a ticker, however old, or None"""
+        is_valid, result = resolve_ticker(ticker)
+        return self.cache.get(f"report_{result}") if is_valid else None
+    
+    def compare(self, tickers, deadline=None, refresh=False):
+        """Compare several tickers with one prompt; returns (report, {ticker: StockData}).
+        
+        The reply's per-ticker metrics blocks are parsed like a metrics
+        response and cached as each ticker's stock data, so one round-trip
+        replaces a metrics and a report call per ticker.
+        """
+        valid = []
+        for ticker in tickers:
+            is_valid, result = resolve_ticker(ticker)
+            if not is_valid:
+                st.warning(f"Invalid ticker format: {ticker} ({result})")
+            elif result not in valid:
+                valid.append(result)
+        if len(valid) > self.config.compare_max_tickers:
+            raise ValueError(f"Compare at most {self.config.compare_max_tickers} tickers at a time")
+        if len(valid) < 2:
+            return "Error fetching comparison: Compare needs at least two valid tickers", {}
+        
+        cache_key = f"compare_{'_'.join(valid)}"
+        cached = None if refresh else self.cache.get(cache_key)
+        if cached and all(self.report_is_fresh(ticker, cached[0]) for ticker in valid):
+            metrics = {ticker: (self.cache.get(f"stock_data_{ticker}") or (None, []))[0] for ticker in valid}
+            for ticker, stock_data in metrics.items():
+                self.snapshot.update(ticker, stock_data)
+            return cached[1], metrics
+        
+        text = self.fetch_comparison(valid, deadline=deadline)
+        if self.is_error_report(text):
+            return text, {}
+        
+        report, metrics = self._split_comparison_response(text, valid)
+        for ticker, stock_data in metrics.items():
+            # Same entries get_stock_data would have written for each ticker
+            if stock_data.has_price:
+                results = [{"content": f"Stock data for {ticker}", "url": "perplexity_api"}]
+                self.cache.set(f"stock_data_{ticker}", (stock_data, results), ttl=self.market_data_ttl(ticker))
+                self.snapshot.update(ticker, stock_data)
+        # Kept as long as the report of every compared ticker would be
+        ttls = [self.report_ttl(ticker) for ticker in valid]
+        self.cache.set(cache_key, (time.time(), report), ttl=None if None in ttls else min(ttls))
+        return report, metrics
+    
+    def fetch_comparison(self, tickers, deadline=None):
+        """Fetch one side-by-side report with a metrics block per ticker"""
+        try:
+            metrics_blocks = "\n\n".join(
+                COMPARISON_METRICS_BLOCK.format(
+                    ticker=ticker,
+                    currency_symbol="₹" if self._is_indian_stock(ticker) else "$"
+                )
+                for ticker in tickers
+            )
+            messages = [
+                {
+                    "role": "system",
+                    "content": COMPARISON_SYSTEM
+                },
+                {
+                    "role": "user",
+                    "content": COMPARISON_QUERY.format(tickers=", ".join(tickers), metrics_blocks=metrics_blocks)
+                }
+            ]
+            response = self._post_completion("compare", messages, deadline=deadline)
+        
+            if response.status_code != 200:
+                return f"Error fetching comparison: API request failed with status {response.status_code}"
+        
+            return response.json()['choices'][0]['message']['content']
+        
+        except Exception as e:
+            return f"Error fetching comparison: {str(e)}"
+    
+    def _split_comparison_response(self, text, tickers):
+        """Split a comparison reply into the report and {ticker: StockData} parsed from its metrics blocks"""
+        headings = list(re.finditer(r'^#{2,4}\s*Metrics:\s*\**\s*([A-Za-z0-9.-]+)\s*\**\s*$', text, re.MULTILINE))
+        if not headings:
+            return text.strip(), {}
+        
+        metrics = {}
+        for heading, following in zip(headings, headings[1:] + [None]):
+            ticker = heading.group(1).upper()
+            if ticker not in tickers:
+                continue
+            block = text[heading.end():following.start() if following else len(text)]
+            metrics[ticker] = self._parse_metrics_response(block, self._is_indian_stock(ticker))
+        return text[:headings[0].start()].strip(), metrics
+    
+    def quick_look(self, ticker, refresh=False):
+        """Metrics only: served from cache, otherwise via the short metrics prompt within the quick-look timeout"""
+        stock_data, _ = self.get_stock_data(ticker, deadline=Deadline(self.config.quick_look_timeout), refresh=refresh)
+        return stock_data
+    
+    def _submit(self, fn, *args, profiler=None, **kwargs):
+        """Run fn on the analysis pool, attached to the calling Streamlit script run"""
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if profiler is not None:
+            fn = profiler.wrap(fn)
+        
+        def run():
+            if ctx is not None:
+                add_script_run_ctx(ctx=ctx)
+            return fn(*args, **kwargs)
+        
+        return self.executor.submit(run)
+    
+    def start_analysis(self, ticker, deadline, profiler=None, refresh=False):
+        """Start the metrics and report fetches concurrently under one deadline.
+        
+        Returns (metrics_task, report_task) handles; the metrics task resolves
+        to the (stock_data, results) tuple of get_stock_data and the report
+        task to the report markdown. A fetch of the same ticker already running
+        for another request is joined instead of repeated. Release both handles
+        once their results are no longer needed: a fetch nobody waits for is
+        cancelled together with its upstream calls. An active ProfileSession
+        also profiles both workers. refresh bypasses the cache reads. Invalid
+        tickers raise ValueError before anything is submitted.
+        """
+        ticker = instrument_id(ticker)
+        handles = []
+        for kind, fn in (("metrics", self.get_stock_data), ("report", self.get_report)):
+            handles.append(self.tasks.start(
+                (kind, ticker),
+                lambda task_deadline, fn=fn: self._submit(fn, ticker, deadline=task_deadline, profiler=profiler, refresh=refresh),
+                deadline.remaining()
+            ))
+        return tuple(handles)
+
+    def analyze_sentiment(self, ticker, deadline=None):
         """Comprehensive sentiment analysis using Perplexity API only"""
         current_date = datetime.datetime.now().strftime("%Y-%m-%d")
         
         # Get stock metrics using dedicated function
-        stock_data, _ = self.get_stock_data(ticker)
+        stock_data, _ = self.get_stock_data(ticker, deadline=deadline)
         
         # Get comprehensive analysis
-        analysis = self.fetch_comprehensive_analysis(ticker)
+        analysis = self.get_report(ticker, deadline=deadline)
         
         return analysis, stock_data
 
     def _create_detailed_prompt(self, ticker, current_date, stock_data, news_summary, price_potential):
         """Create detailed analysis prompt with formatted data"""
-        current_price_formatted = self.data_processor.format_currency(stock_data['current_price'])
-        target_price_formatted = self.data_processor.format_currency(stock_data['target_price'])
+        current_price_formatted = self.data_processor.format_currency(stock_data.current_price)
+        target_price_formatted = self.data_processor.format_currency(stock_data.target_price)
+        pe_ratio_formatted = "N/A" if is_missing(stock_data.pe_ratio) else f"{stock_data.pe_ratio:.2f}"
+        price_change_formatted = "N/A" if is_missing(stock_data.price_change) else f"{stock_data.price_change:.2f}%"
         
         return f"""
         Provide a comprehensive investment analysis for {ticker} stock as of {current_date}.
@@ -283,8 +660,8 @@ class StockSentimentAnalyzer:
         **Market Data Available:**
         • Current Price: {current_price_formatted}
         • Target Price: {target_price_formatted}
-        • PE Ratio: {stock_data['pe_ratio']:.2f}
-        • Recent Price Change: {stock_data['price_change']:.2f}%
+        • PE Ratio: {pe_ratio_formatted}
+        • Recent Price Change: {price_change_formatted}
         • Potential Upside: {price_potential:.2f}%
 
         **Recent News Summary:**
@@ -367,66 +744,4 @@ class StockSentimentAnalyzer:
 
     def _get_enhanced_system_instruction(self):
         """Get enhanced system instruction for comprehensive analysis"""
-        return """
-        You are an expert financial analyst specializing in comprehensive stock analysis. Your task is to provide detailed, accurate, and actionable investment analysis using real-time financial data.
-
-        **Your Capabilities:**
-        - Access to real-time stock data from major financial sources
-        - Deep analysis of market trends, news, and financial metrics
-        - Professional investment recommendations with clear reasoning
-
-        **Analysis Requirements:**
-
-        1. **Data Accuracy**: Always use precise, up-to-date financial data from reliable sources like Yahoo Finance, Bloomberg, MarketWatch, or Google Finance.
-
-        2. **Structure Your Response Using These Headers:**
-
-        ## 📊 Market Sentiment Analysis
-        **Sentiment:** [Bullish/Bearish/Neutral]  
-        **Investor Confidence:** [High/Medium/Low]  
-        **Key Insight:** [Brief explanation with data points]
-
-        ## 📈 Recent Developments  
-        - **Earnings & Financial Results:** [Latest earnings with specific numbers]
-        - **Major Announcements:** [Recent company news and developments]  
-        - **Industry Trends:** [Sector-specific trends affecting the stock]
-
-        ## 🔍 Technical Analysis
-        - **Price Trend:** [Current technical indicators and chart patterns]
-        - **Support/Resistance:** [Key price levels with specific values]
-        - **Volume Analysis:** [Trading volume trends and significance]
-
-        ## ⚠️ Risk Assessment
-        **Market Risks:** [Broad market factors affecting the stock]  
-        **Company Risks:** [Company-specific risks and challenges]  
-        **Industry Risks:** [Sector-wide risks and regulatory concerns]
-
-        ## 🎯 Investment Recommendation
-        **🏷️ Rating:** **[BUY/SELL/HOLD]**  
-        **📊 Confidence:** [High/Medium/Low]  
-        **💰 Entry Range:** [Specific price range]  
-        **🛑 Stop Loss:** [Specific price with reasoning]  
-        **🎯 Target Price:** [12-month target with basis]  
-        **⏰ Timeframe:** [Short/Medium/Long-term investment horizon]
-
-        ## 💡 Key Investment Thesis
-        1. **[Primary reason with specific data/metrics]**
-        2. **[Secondary reason with supporting evidence]** 
-        3. **[Third reason with quantitative backing]**
-
-        **Formatting Guidelines:**
-        - Use emojis for headers as shown above
-        - Make key metrics and ratings **bold**
-        - Include specific numbers, percentages, and price targets
-        - Cite recent data points (within last 30 days when possible)
-        - Use professional, objective language
-        - Avoid speculation - base recommendations on concrete data
-
-        **Quality Standards:**
-        - Ensure all price targets and metrics are realistic and data-driven
-        - Include specific timeframes for predictions
-        - Reference recent financial reports, earnings calls, or major news
-        - Provide actionable insights suitable for investment decisions
-
-        Remember: Investors rely on your analysis for financial decisions. Be accurate, thorough, and professional.
-        """ 
\ No newline at end of file
+        return self.prompts.system_instruction
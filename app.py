@@ -1,11 +1,48 @@
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import nullcontext
 import streamlit as st
 from analyzer import StockSentimentAnalyzer
 from ui_components import UIComponents
-from config import Config
+from config import get_config
+from deadline import Deadline
+from profiling import ProfileSession
+from instruments import resolve_ticker
+
+@st.cache_resource
+def get_analyzer(perplexity_api_key):
+    """Create the analyzer once per process and share it across reruns and sessions"""
+    return StockSentimentAnalyzer(perplexity_api_key)
+
+def wait_for(task, deadline, default=None):
+    """Wait for a task until the deadline; returns default if it has not finished.
+    
+    The wait is sliced so Streamlit can interrupt it: reading session state
+    is a yield point that ends this run when the user reruns or disconnects.
+    """
+    while True:
+        try:
+            return task.result(timeout=min(0.25, deadline.remaining()))
+        except FutureTimeoutError:
+            if deadline.expired:
+                return default
+            st.session_state.get("ticker_input")
+
+def render_result(result, metrics_shown=False):
+    """Render an analysis result as kept in session state; metrics_shown skips metrics already on screen"""
+    if result['request'][1] == "compare":
+        UIComponents.render_comparison(result['report'], result['metrics'])
+        return
+    if not metrics_shown:
+        UIComponents.render_metrics(result['stock_data'], result['history'])
+    if result.get('warning'):
+        UIComponents.render_warning(result['warning'])
+    if result.get('analysis'):
+        UIComponents.render_analysis(result['analysis'])
 
 def main():
-    # Initialize configuration
-    config = Config()
+    # Configuration is parsed once per process
+    config = get_config()
     
     # Set page configuration
     st.set_page_config(
@@ -20,33 +57,124 @@ def main():
     # Render header
     UIComponents.render_header()
     
+    # Results of this session's last analysis, re-rendered on reruns
+    last_result = st.session_state.get("last_result")
+    pending_input = st.session_state.get("ticker_input", "").upper()
+    
     # Render search section
-    ticker, analyze_button = UIComponents.render_search_section()
+    # Refresh is offered once there are results for the input, including on the run that fetches them
+    ticker, analyze_button, full_report, refresh_button = UIComponents.render_search_section(
+        show_refresh=st.session_state.get("analyze", False)
+        or (last_result is not None and last_result['request'][0] == pending_input)
+    )
+    comparing = ',' in ticker
+    request = (ticker, "compare" if comparing else "full" if full_report else "quick")
     
-    # Main analysis logic
-    if analyze_button and ticker:
+    # Main analysis logic: fetch only for a new ticker or mode, an explicit
+    # refresh, or a retry of a result that did not complete
+    if ticker and (analyze_button or refresh_button) and (
+        refresh_button or last_result is None or last_result['request'] != request or not last_result['complete']
+    ):
         # Validate API keys
         keys_valid, missing_keys = config.validate_api_keys()
         if not keys_valid:
             UIComponents.render_error("Configuration", f"Missing API keys: {', '.join(missing_keys)}")
             return
         
+        # Comparisons resolve each of their tickers; a single ticker is resolved
+        # to its canonical instrument ID before any cache or network work
+        if not comparing:
+            is_valid, result = resolve_ticker(ticker)
+            if not is_valid:
+                UIComponents.render_error(ticker, f"Invalid ticker format: {result}")
+                return
+            ticker = result
+        
+        # Opt-in deep-dive profiling; a no-op context otherwise. The query
+        # parameter is honoured only where the deployment allows it
+        profiling = config.profile_analysis or (
+            config.profile_query_param and st.query_params.get("profile") == "1"
+        )
+        profiler = ProfileSession(ticker, config.profile_dir) if profiling else None
+        
         try:
-            # Initialize analyzer
-            analyzer = StockSentimentAnalyzer(config.perplexity_api_key)
-            
-            # Show loading spinner and perform analysis
-            with UIComponents.render_loading_spinner("Analyzing..."):
-                analysis, stock_data = analyzer.analyze_sentiment(ticker)
-            
-            # Render metrics if available
-            UIComponents.render_metrics(stock_data)
-            
-            # Render analysis report
-            UIComponents.render_analysis(analysis)
-            
+            with profiler or nullcontext():
+                # Reuse the process-wide analyzer
+                analyzer = get_analyzer(config.perplexity_api_key)
+                
+                history = None if comparing else analyzer.price_history.query(ticker, max_points=config.chart_max_points)
+                if not comparing:
+                    # Ranks the tickers that static_pages.py pre-renders
+                    analyzer.popularity.record(ticker)
+                
+                result = None
+                if comparing:
+                    # Comparison: one prompt covers every ticker, metrics included
+                    tickers = [symbol for symbol in ticker.split(',') if symbol.strip()]
+                    with UIComponents.render_loading_spinner("Comparing..."):
+                        report, metrics = analyzer.compare(tickers, deadline=Deadline(config.analysis_deadline), refresh=refresh_button)
+                    if analyzer.is_error_report(report):
+                        UIComponents.render_error(ticker, report)
+                    else:
+                        result = {'report': report, 'metrics': metrics, 'complete': True}
+                elif full_report:
+                    # Metrics and report run concurrently under one deadline
+                    deadline = Deadline(config.analysis_deadline)
+                    metrics_task, report_task = analyzer.start_analysis(ticker, deadline, profiler, refresh=refresh_button)
+                    try:
+                        # Render metrics as soon as they arrive, while the report is still pending
+                        with UIComponents.render_loading_spinner("Fetching metrics..."):
+                            stock_data, _ = wait_for(metrics_task, deadline, (None, []))
+                        UIComponents.render_metrics(stock_data, history)
+                    
+                        with UIComponents.render_loading_spinner("Writing report..."):
+                            analysis = wait_for(report_task, deadline)
+                    finally:
+                        # Runs on reruns and disconnects too; fetches nobody else waits for are aborted
+                        metrics_task.release()
+                        report_task.release()
+                
+                    result = {'stock_data': stock_data, 'history': history, 'complete': False}
+                    if analysis is not None and not analyzer.is_error_report(analysis):
+                        result.update(analysis=analysis, complete=True)
+                    else:
+                        # Deadline expired or the call failed: fall back to whatever is ready
+                        cached = analyzer.cached_report(ticker)
+                        if cached:
+                            fetched_at, report = cached
+                            result['warning'] = f"A fresh report is not available yet; showing the report from {time.strftime('%H:%M', time.localtime(fetched_at))}."
+                            result['analysis'] = report
+                        elif analysis is not None and not deadline.expired:
+                            result['analysis'] = analysis
+                        else:
+                            result['warning'] = f"The full report did not finish within {config.analysis_deadline:g}s. Please try again shortly."
+                else:
+                    # Quick look: metrics only, from cache or the short metrics prompt
+                    with UIComponents.render_loading_spinner("Fetching metrics..."):
+                        stock_data = analyzer.quick_look(ticker, refresh=refresh_button)
+                    result = {'stock_data': stock_data, 'history': history, 'complete': bool(stock_data and stock_data.has_price)}
+                
+                if result is not None:
+                    result.update(request=request, fetched_at=time.time())
+                    st.session_state["last_result"] = result
+                    render_result(result, metrics_shown=request[1] == "full")
+                
         except Exception as e:
             UIComponents.render_error(ticker, str(e))
+        
+        if profiler is not None and profiler.path:
+            UIComponents.render_success(f"Profile written to {profiler.path}")
+    elif last_result is not None and last_result['request'] == request:
+        # Rerun for another widget, or Analyze again on the same input: nothing to fetch
+        render_result(last_result)
+    
+    # Screener over metrics already fetched by this process (never calls the
+    # API) and usage of the API key pool
+    if config.perplexity_api_key:
+        analyzer = get_analyzer(config.perplexity_api_key)
+        UIComponents.render_screener(analyzer.snapshot)
+        if len(analyzer.key_pool) > 1:
+            UIComponents.render_key_usage(analyzer.key_pool.stats())
     
     # Render footer
     UIComponents.render_footer()
@@ -0,0 +1,252 @@
+"""Nightly batch generation of reports for a ticker universe, resumable from a checkpoint.
+
+Usage: python batch_reports.py nifty100.txt sp500.txt [--workers N] [--run-id ID]
+"""
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+from deadline import Cancelled, Deadline
+from instruments import resolve_ticker
+
+
+def read_universe(path: str) -> List[str]:
+    """Tickers listed in a file, one per line or comma-separated; '#' starts a comment"""
+    tickers = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.split('#', 1)[0]
+            tickers.extend(part.strip() for part in line.split(',') if part.strip())
+    return tickers
+
+
+class Checkpoint:
+    """Per-ticker outcome of one batch run, rewritten atomically after every ticker.
+
+    A checkpoint left by a different run ID (by default, an earlier night)
+    is discarded, so each run starts fresh but a crashed run resumes.
+    """
+
+    def __init__(self, path: str, run_id: str):
+        self.path = path
+        self.run_id = run_id
+        self.entries = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            state = None
+        if state and state.get('run_id') == run_id:
+            self.entries = state.get('tickers', {})
+
+    def is_done(self, ticker: str) -> bool:
+        return self.entries.get(ticker, {}).get('status') == 'done'
+
+    def record(self, ticker: str, status: str, attempts: int, seconds: float,
+               error: Optional[str] = None) -> None:
+        entry = {'status': status, 'attempts': attempts, 'seconds': round(seconds, 1), 'finished_at': time.time()}
+        if error:
+            entry['error'] = error
+        with self._lock:
+            self.entries[ticker] = entry
+            self._write()
+
+    def _write(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump({'run_id': self.run_id, 'updated_at': time.time(), 'tickers': self.entries}, handle)
+        os.replace(tmp_path, self.path)
+
+
+class BatchRunner:
+    """Generate metrics and a report for every ticker of a universe, skipping those already done.
+
+    Tickers run on a bounded worker pool. Before each upstream call a worker
+    waits until the analyzer's key pool has budget left, so the batch stays
+    within every key's requests-per-minute limit. A failed ticker is retried
+    with a doubling delay. Results go through get_stock_data and get_report,
+    so they land in the analyzer's cache exactly as interactive requests
+    would; with a shared cache backend, the app serves them warm.
+    """
+
+    def __init__(self, analyzer, tickers: Iterable[str], checkpoint: Checkpoint,
+                 workers: Optional[int] = None, max_attempts: Optional[int] = None,
+                 retry_delay: float = 30.0):
+        config = analyzer.config
+        self.analyzer = analyzer
+        self.checkpoint = checkpoint
+        self.workers = workers or config.batch_workers
+        self.max_attempts = max_attempts or config.batch_max_attempts
+        self.retry_delay = retry_delay
+        self.invalid = []
+        resolved = {}
+        for ticker in tickers:
+            is_valid, result = resolve_ticker(ticker)
+            if is_valid:
+                resolved.setdefault(result, None)
+            else:
+                self.invalid.append(ticker)
+        self.tickers = list(resolved)
+        self.stats = {'total': len(self.tickers), 'skipped': 0, 'done': 0, 'failed': 0}
+        self._deadlines = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _pace(self) -> None:
+        """Block until some API key has budget for another call"""
+        while not self._stop.is_set():
+            wait = self.analyzer.key_pool.available_in()
+            if wait <= 0:
+                return
+            self._stop.wait(wait)
+
+    def _deadline(self) -> Deadline:
+        """A deadline for one upstream call, cancelled by stop()"""
+        deadline = Deadline(self.analyzer.config.analysis_deadline)
+        with self._lock:
+            self._deadlines.add(deadline)
+        if self._stop.is_set():
+            deadline.cancel()
+        return deadline
+
+    def _attempt(self, ticker: str, need_metrics: bool) -> None:
+        """One try at a ticker; raises with the reason if it is not fully cached afterwards"""
+        if need_metrics:
+            self._pace()
+            deadline = self._deadline()
+            try:
+                stock_data, _ = self.analyzer.get_stock_data(ticker, deadline=deadline, refresh=True)
+            finally:
+                with self._lock:
+                    self._deadlines.discard(deadline)
+            if deadline.cancelled:
+                raise Cancelled("Batch stopped")
+            if stock_data is None or not stock_data.has_price:
+                raise RuntimeError("no metrics returned")
+
+        self._pace()
+        deadline = self._deadline()
+        try:
+            report = self.analyzer.get_report(ticker, deadline=deadline, refresh=True)
+        finally:
+            with self._lock:
+                self._deadlines.discard(deadline)
+        if deadline.cancelled:
+            raise Cancelled("Batch stopped")
+        if self.analyzer.is_error_report(report):
+            raise RuntimeError(report)
+
+    def process(self, ticker: str) -> Optional[Dict]:
+        """Run one ticker with retries and checkpoint the outcome; None if the batch was stopped first"""
+        start = time.monotonic()
+        need_metrics = True
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            if attempt > 1 and self._stop.wait(self.retry_delay * 2 ** (attempt - 2)):
+                return None
+            try:
+                self._attempt(ticker, need_metrics)
+            except Cancelled:
+                return None
+            except Exception as e:
+                error = str(e)
+                # Metrics that made it into the cache are not fetched again
+                need_metrics = need_metrics and not self.analyzer.cache.get(f"stock_data_{ticker}")
+                continue
+            self.checkpoint.record(ticker, 'done', attempt, time.monotonic() - start)
+            return self.checkpoint.entries[ticker]
+        self.checkpoint.record(ticker, 'failed', self.max_attempts, time.monotonic() - start, error)
+        return self.checkpoint.entries[ticker]
+
+    def run(self, progress=print) -> Dict[str, int]:
+        """Process every pending ticker; returns counts of done, failed and skipped tickers"""
+        pending = [ticker for ticker in self.tickers if not self.checkpoint.is_done(ticker)]
+        self.stats['skipped'] = len(self.tickers) - len(pending)
+        if self.stats['skipped']:
+            progress(f"Resuming run {self.checkpoint.run_id}: {self.stats['skipped']} of {len(self.tickers)} tickers already done")
+
+        start = time.monotonic()
+        finished = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(self.process, ticker): ticker for ticker in pending}
+            try:
+                for future in as_completed(futures):
+                    entry = future.result()
+                    if entry is None:
+                        continue
+                    finished += 1
+                    self.stats[entry['status']] += 1
+                    elapsed = time.monotonic() - start
+                    rate = finished / elapsed * 60 if elapsed > 0 else 0.0
+                    eta = (len(pending) - finished) / rate if rate else 0.0
+                    progress(
+                        f"[{self.stats['skipped'] + finished:>4}/{len(self.tickers)}] {futures[future]:<14} "
+                        f"{entry['status']:<6} {entry['attempts']} attempt(s), {entry['seconds']:.1f}s | "
+                        f"{rate:.1f}/min, ETA {datetime.timedelta(seconds=round(eta * 60))}"
+                    )
+            finally:
+                # Also reached on KeyboardInterrupt: unstarted tickers stay pending in the checkpoint
+                self.stop()
+                for future in futures:
+                    future.cancel()
+        return self.stats
+
+    def stop(self) -> None:
+        """Stop starting tickers and abort the calls in flight"""
+        self._stop.set()
+        with self._lock:
+            deadlines = list(self._deadlines)
+        for deadline in deadlines:
+            deadline.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from analyzer import StockSentimentAnalyzer
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("universe", nargs="*", help="Files listing tickers, one per line or comma-separated")
+    parser.add_argument("--tickers", nargs="+", default=[], help="Tickers to include besides the universe files")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--attempts", type=int, help="Tries per ticker before it is recorded as failed")
+    parser.add_argument("--retry-delay", type=float, default=30.0, help="Seconds before the first retry, doubling after")
+    parser.add_argument("--run-id", default=datetime.date.today().isoformat(),
+                        help="Checkpoint entries of the same run ID are resumed (default: today's date)")
+    parser.add_argument("--checkpoint")
+    args = parser.parse_args()
+
+    config = get_config()
+    tickers = [ticker for path in args.universe for ticker in read_universe(path)] + args.tickers
+    if not tickers:
+        parser.error("No tickers given")
+    analyzer = StockSentimentAnalyzer(config.perplexity_api_key)
+    if not analyzer.cache.shared:
+        parser.error("CACHE_BACKEND=memory would discard the results on exit; use file or redis")
+
+    runner = BatchRunner(
+        analyzer,
+        tickers,
+        Checkpoint(args.checkpoint or config.batch_checkpoint, args.run_id),
+        workers=args.workers,
+        max_attempts=args.attempts,
+        retry_delay=args.retry_delay,
+    )
+    if runner.invalid:
+        print(f"Skipping invalid tickers: {', '.join(runner.invalid)}")
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same run ID to resume")
+    print(runner.stats)
+    for label, usage in analyzer.key_pool.stats().items():
+        print(f"{label}: {usage}")
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+from stock_data import StockData
+
+
+def encode_value(value: Any) -> bytes:
+    """Serialize a cache value (tuples, StockData records, strings, numbers) to JSON bytes"""
+    def encode(item):
+        if isinstance(item, StockData):
+            return {'__stock_data__': {name: getattr(item, name) for name in StockData.__slots__}}
+        if isinstance(item, tuple):
+            return {'__tuple__': [encode(element) for element in item]}
+        if isinstance(item, list):
+            return [encode(element) for element in item]
+        if isinstance(item, dict):
+            return {key: encode(element) for key, element in item.items()}
+        return item
+
+    return json.dumps(encode(value), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decode_value(data: bytes) -> Any:
+    """Inverse of encode_value"""
+    def decode(item):
+        if isinstance(item, list):
+            return [decode(element) for element in item]
+        if isinstance(item, dict):
+            if '__stock_data__' in item:
+                return StockData(**item['__stock_data__'])
+            if '__tuple__' in item:
+                return tuple(decode(element) for element in item['__tuple__'])
+            return {key: decode(element) for key, element in item.items()}
+        return item
+
+    return decode(json.loads(data.decode('utf-8')))
+
+
+class InProcessBackend:
+    """Per-process dict cache with FIFO eviction; values are stored as-is"""
+
+    shared = False
+
+    def __init__(self, max_size: int = 100):
+        self.cache = {}
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            self.cache.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            if key not in self.cache and len(self.cache) >= self.max_size:
+                # Remove oldest entry
+                oldest_key = next(iter(self.cache))
+                del self.cache[oldest_key]
+            self.cache[key] = (value, None if ttl is None else time.time() + ttl)
+
+    def delete(self, key: str) -> None:
+        self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+class FileBackend:
+    """Cache stored as one JSON file per key in a directory shared by replicas on the same host or volume"""
+
+    shared = True
+
+    def __init__(self, directory: str, default_ttl: Optional[float] = None):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                expires_at = float(handle.readline())
+                data = handle.read()
+        except (OSError, ValueError):
+            return None
+        if expires_at and expires_at <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return decode_value(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else 0
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(f"{expires_at}\n".encode('ascii'))
+            handle.write(encode_value(value))
+        os.replace(tmp_path, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class RedisBackend:
+    """Cache on any server speaking the Redis protocol (RESP), using a minimal built-in client.
+
+    Connection errors are treated as cache misses so a cache outage never
+    fails an analysis; the connection is re-established on the next call.
+    """
+
+    shared = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "tradeo:",
+                 default_ttl: Optional[float] = None, socket_timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.socket_timeout = socket_timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        self._reader = self._sock.makefile('rb')
+        try:
+            if self.password:
+                self._command('AUTH', self.password)
+            if self.db:
+                self._command('SELECT', str(self.db))
+        except RuntimeError as e:
+            self._close()
+            raise ConnectionError(f"Redis handshake failed: {e}")
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _command(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RuntimeError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply: {line!r}")
+
+    def _call(self, *args):
+        """Run one command, reconnecting once; returns None if the server is unreachable"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._command(*args)
+                except (OSError, ConnectionError):
+                    self._close()
+                    if attempt:
+                        return None
+                except RuntimeError:
+                    # Error reply from the server; treat like a miss
+                    return None
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self._call('GET', self.prefix + key)
+        return None if data is None else decode_value(data)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        args = ['SET', self.prefix + key, encode_value(value)]
+        if ttl:
+            args += ['PX', str(max(1, int(ttl * 1000)))]
+        self._call(*args)
+
+    def delete(self, key: str) -> None:
+        self._call('DEL', self.prefix + key)
+
+    def clear(self) -> None:
+        keys = self._call('KEYS', self.prefix + '*') or []
+        if keys:
+            self._call('DEL', *keys)
+
+
+def create_cache_backend(config):
+    """Build the cache backend selected by Config.cache_backend"""
+    if config.cache_backend == "redis":
+        return RedisBackend(config.redis_url, default_ttl=config.cache_ttl)
+    if config.cache_backend == "file":
+        return FileBackend(config.cache_dir, default_ttl=config.cache_ttl)
+    return InProcessBackend(max_size=config.cache_max_size)
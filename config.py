@@ -1,11 +1,13 @@
+import json
 import os
+from functools import lru_cache
 import streamlit as st
-from dotenv import load_dotenv
 
 class Config:
     """Configuration class for managing API keys and app settings"""
     
     def __init__(self):
+        from dotenv import load_dotenv  # Only needed while the config is parsed
         load_dotenv()
         # Try Streamlit secrets first, then fall back to environment variables
         try:
@@ -13,6 +15,24 @@ class Config:
         except (KeyError, FileNotFoundError):
             self.perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
         
+        # Optional pool of further keys (comma-separated); calls are spread
+        # across all keys, each within its own requests-per-minute budget
+        try:
+            api_keys = st.secrets["PERPLEXITY_API_KEYS"]
+        except (KeyError, FileNotFoundError):
+            api_keys = os.getenv("PERPLEXITY_API_KEYS", "")
+        if isinstance(api_keys, str):
+            api_keys = api_keys.split(",")
+        self.perplexity_api_keys = [key.strip() for key in api_keys if key.strip()]
+        if not self.perplexity_api_key and self.perplexity_api_keys:
+            self.perplexity_api_key = self.perplexity_api_keys[0]
+        self.api_key_rpm = int(os.getenv("API_KEY_RPM", "50"))
+        
+        # Supabase project holding the stock_analyses history (see history_store.py);
+        # shares the Next.js app's settings unless overridden
+        self.supabase_url = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+        self.supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+        
         # App settings
         self.app_title = "TRADEO"
         self.app_subtitle = "stonks made simple fr 📈"
@@ -27,6 +47,90 @@ class Config:
         self.search_depth = "advanced"
         self.max_results = 10
         
+        # Prompt settings: "full", "compact" or "minimal" (see prompts.py)
+        self.prompt_profile = os.getenv("PROMPT_PROFILE", "full")
+        
+        # Price history settings (see price_history.py)
+        self.price_history_dir = os.getenv("PRICE_HISTORY_DIR", os.path.join("data", "price_history"))
+        self.chart_max_points = 2000
+        
+        # Report format: "markdown" has the model write the full layout, "json"
+        # has it return compact typed fields that are rendered locally
+        self.report_format = os.getenv("REPORT_FORMAT", "markdown")
+        
+        # Local technical indicators: "prompt" injects them into the analysis
+        # prompt, "render" renders the section locally, "off" leaves it to the model
+        self.technicals_mode = os.getenv("TECHNICALS_MODE", "prompt")
+        
+        # Model routing per call type, in order of preference (see routing.py).
+        # MODEL_ROUTES and LATENCY_TARGETS accept JSON overrides per call type.
+        self.model_routes = {
+            "metrics": [{"model": "sonar", "max_tokens": 200}],
+            "report": [{"model": "sonar", "max_tokens": None}],
+            "compare": [{"model": "sonar", "max_tokens": None}]
+        }
+        self.model_routes.update(json.loads(os.getenv("MODEL_ROUTES", "{}")))
+        self.latency_targets = {"metrics": 4.0, "report": 45.0, "compare": 60.0}
+        self.latency_targets.update(json.loads(os.getenv("LATENCY_TARGETS", "{}")))
+        
+        # Quick look serves metrics only and gives up after this many seconds
+        self.quick_look_timeout = float(os.getenv("QUICK_LOOK_TIMEOUT", "6"))
+        
+        # Overall time budget for a full analysis (metrics + report), in seconds
+        self.analysis_deadline = float(os.getenv("ANALYSIS_DEADLINE", "60"))
+        self.analysis_workers = 8
+        
+        # Comparison mode covers at most this many tickers in one prompt
+        self.compare_max_tickers = int(os.getenv("COMPARE_MAX_TICKERS", "4"))
+        
+        # Cache backend: "memory" (per process), "file" (shared directory) or
+        # "redis" (any Redis-protocol server, shared by every replica)
+        self.cache_backend = os.getenv("CACHE_BACKEND", "memory")
+        self.cache_dir = os.getenv("CACHE_DIR", os.path.join("data", "cache"))
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.cache_ttl = 6 * 3600
+        self.cache_max_size = 100
+        
+        # Market-data expiry follows the exchange calendar (trading_calendar.py):
+        # entries live until the next session opens while the market is closed
+        # and for this many seconds during live trading
+        self.market_holidays_file = os.getenv(
+            "MARKET_HOLIDAYS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_holidays.csv")
+        )
+        self.live_data_ttl = int(os.getenv("LIVE_DATA_TTL", "300"))
+        # Reports are served for this many seconds, and those written while
+        # the market is closed until this long into the next session
+        self.report_max_age = int(os.getenv("REPORT_MAX_AGE", "3600"))
+        
+        # Watch daemon (see watcher.py): re-analyze only when the price moves
+        # this many percent, or the daily change moves this many points,
+        # since the last report
+        self.watch_price_threshold = float(os.getenv("WATCH_PRICE_THRESHOLD", "2.0"))
+        self.watch_change_threshold = float(os.getenv("WATCH_CHANGE_THRESHOLD", "1.5"))
+        self.watch_min_interval = 60
+        self.watch_max_interval = 1800
+        
+        # Nightly batch reports (see batch_reports.py): concurrent tickers,
+        # tries per ticker and where progress is checkpointed
+        self.batch_workers = int(os.getenv("BATCH_WORKERS", "4"))
+        self.batch_max_attempts = int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+        self.batch_checkpoint = os.getenv("BATCH_CHECKPOINT", os.path.join("data", "batch_checkpoint.json"))
+        
+        # Static report pages for the most requested tickers (see static_pages.py)
+        self.static_pages_dir = os.getenv("STATIC_PAGES_DIR", os.path.join("public", "reports"))
+        self.static_pages_top = int(os.getenv("STATIC_PAGES_TOP", "30"))
+        
+        # Full-text index over generated reports (see report_index.py), snapshot
+        # to disk after every so many new reports and restored on first use
+        self.report_index_path = os.getenv("REPORT_INDEX_PATH", os.path.join("data", "report_index.npz"))
+        self.report_index_snapshot_every = int(os.getenv("REPORT_INDEX_SNAPSHOT_EVERY", "50"))
+        
+        # Opt-in profiling of single analysis runs; PROFILE_QUERY_PARAM also
+        # lets a request enable it with ?profile=1. See profiling.py
+        self.profile_analysis = os.getenv("PROFILE_ANALYSIS", "").lower() in ("1", "true", "yes")
+        self.profile_query_param = os.getenv("PROFILE_QUERY_PARAM", "").lower() in ("1", "true", "yes")
+        self.profile_dir = os.getenv("PROFILE_DIR", os.path.join("data", "profiles"))
+        
         # Supported currencies and formats
         self.currency_symbols = ['$', 'usd', 'dollar', '₹', 'rs.', 'inr']
         self.search_sites = [
@@ -52,4 +156,10 @@ class Config:
     
     def get_news_query(self, ticker):
         """Generate optimized search query for news data"""
-        return f"{ticker} stock news financial analysis earnings recent developments" 
\ No newline at end of file
+        return f"{ticker} stock news financial analysis earnings recent developments"
+
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Return the process-wide configuration, parsed once on first use"""
+    return Config()
@@ -32,6 +32,34 @@ CREATE INDEX idx_stock_analyses_ticker ON stock_analyses(ticker);
 CREATE INDEX idx_stock_analyses_created_at ON stock_analyses(created_at DESC);
 CREATE INDEX idx_stock_analyses_is_favorite ON stock_analyses(is_favorite) WHERE is_favorite = TRUE;
 
+-- Keyset pagination of a user's history (history_store.py) and latest analysis per ticker
+CREATE INDEX idx_stock_analyses_user_created ON stock_analyses(user_id, created_at DESC, id DESC);
+CREATE INDEX idx_stock_analyses_user_ticker_created ON stock_analyses(user_id, ticker, created_at DESC, id DESC);
+
+-- Incremental scans of every user's analyses, oldest first (report_index.py)
+CREATE INDEX idx_stock_analyses_created_id ON stock_analyses(created_at, id);
+
+-- Most recent analysis of each ticker per user, without the large analysis column.
+-- Kept up to date by the triggers below so pages of it are index range scans
+-- (an earlier version of this script created it as a DISTINCT ON view)
+DROP VIEW IF EXISTS latest_stock_analyses;
+CREATE TABLE latest_stock_analyses (
+  user_id TEXT NOT NULL,
+  ticker TEXT NOT NULL,
+  id UUID NOT NULL,
+  stock_data JSONB NOT NULL,
+  is_favorite BOOLEAN DEFAULT FALSE,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  PRIMARY KEY (user_id, ticker)
+);
+CREATE INDEX idx_latest_stock_analyses_user_created ON latest_stock_analyses(user_id, created_at DESC, id DESC);
+
+-- Backfill from existing analyses (a no-op on a new database)
+INSERT INTO latest_stock_analyses (user_id, ticker, id, stock_data, is_favorite, created_at)
+  SELECT DISTINCT ON (user_id, ticker) user_id, ticker, id, stock_data, is_favorite, created_at
+  FROM stock_analyses
+  ORDER BY user_id, ticker, created_at DESC, id DESC;
+
 -- Create function to update the updated_at column
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -50,11 +78,61 @@ CREATE TRIGGER update_stock_analyses_updated_at
   BEFORE UPDATE ON stock_analyses
   FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Recompute the latest analysis of one user's ticker from idx_stock_analyses_user_ticker_created
+CREATE OR REPLACE FUNCTION public.refresh_latest_stock_analysis(p_user_id TEXT, p_ticker TEXT)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.latest_stock_analyses (user_id, ticker, id, stock_data, is_favorite, created_at)
+    SELECT user_id, ticker, id, stock_data, is_favorite, created_at
+    FROM public.stock_analyses
+    WHERE user_id = p_user_id AND ticker = p_ticker
+    ORDER BY created_at DESC, id DESC
+    LIMIT 1
+  ON CONFLICT (user_id, ticker) DO UPDATE
+    SET id = EXCLUDED.id, stock_data = EXCLUDED.stock_data,
+        is_favorite = EXCLUDED.is_favorite, created_at = EXCLUDED.created_at;
+  IF NOT FOUND THEN
+    DELETE FROM public.latest_stock_analyses WHERE user_id = p_user_id AND ticker = p_ticker;
+  END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Keep latest_stock_analyses in step with stock_analyses: an insert replaces
+-- the latest row only if it is newer, updates and deletes recompute the pair
+CREATE OR REPLACE FUNCTION public.sync_latest_stock_analyses()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO public.latest_stock_analyses AS latest (user_id, ticker, id, stock_data, is_favorite, created_at)
+    VALUES (NEW.user_id, NEW.ticker, NEW.id, NEW.stock_data, NEW.is_favorite, NEW.created_at)
+    ON CONFLICT (user_id, ticker) DO UPDATE
+      SET id = EXCLUDED.id, stock_data = EXCLUDED.stock_data,
+          is_favorite = EXCLUDED.is_favorite, created_at = EXCLUDED.created_at
+      WHERE (latest.created_at, latest.id) < (EXCLUDED.created_at, EXCLUDED.id);
+    RETURN NULL;
+  END IF;
+  PERFORM public.refresh_latest_stock_analysis(OLD.user_id, OLD.ticker);
+  IF TG_OP = 'UPDATE' AND (NEW.user_id, NEW.ticker) IS DISTINCT FROM (OLD.user_id, OLD.ticker) THEN
+    PERFORM public.refresh_latest_stock_analysis(NEW.user_id, NEW.ticker);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER sync_latest_stock_analyses_insert
+  AFTER INSERT ON stock_analyses
+  FOR EACH ROW EXECUTE FUNCTION public.sync_latest_stock_analyses();
+
+CREATE TRIGGER sync_latest_stock_analyses_change
+  AFTER UPDATE OF user_id, ticker, stock_data, is_favorite, created_at OR DELETE ON stock_analyses
+  FOR EACH ROW EXECUTE FUNCTION public.sync_latest_stock_analyses();
+
 -- Row Level Security (RLS) policies
 
--- Enable RLS on both tables
+-- Enable RLS on all tables
 ALTER TABLE profiles ENABLE ROW LEVEL SECURITY;
 ALTER TABLE stock_analyses ENABLE ROW LEVEL SECURITY;
+ALTER TABLE latest_stock_analyses ENABLE ROW LEVEL SECURITY;
 
 -- Profiles policies
 CREATE POLICY "Users can view their own profile" ON profiles
@@ -79,6 +157,10 @@ CREATE POLICY "Users can update their own analyses" ON stock_analyses
 CREATE POLICY "Users can delete their own analyses" ON stock_analyses
   FOR DELETE USING (auth.uid()::text = user_id);
 
+-- Latest analyses policies; rows are written only by the sync triggers
+CREATE POLICY "Users can view their own latest analyses" ON latest_stock_analyses
+  FOR SELECT USING (auth.uid()::text = user_id);
+
 -- Create a function to handle user creation
 CREATE OR REPLACE FUNCTION public.handle_new_user()
 RETURNS TRIGGER AS $$
@@ -0,0 +1,73 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call is attempted after its request's deadline has passed"""
+
+
+class Cancelled(DeadlineExceeded):
+    """Raised when a call is attempted after its request was cancelled"""
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by every upstream call it makes.
+
+    A deadline can also be cancelled, which expires it at once and runs the
+    callbacks registered with on_cancel (e.g. closing an open response).
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative"""
+        if self._cancelled:
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Timeout for the next call: the time left, capped at `cap`; raises once expired"""
+        if self._cancelled:
+            raise Cancelled("Request cancelled")
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:g}s exceeded")
+        return remaining if cap is None else min(cap, remaining)
+
+    def cancel(self) -> None:
+        """Expire the deadline now and run the on_cancel callbacks"""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback when the deadline is cancelled (at once if it already is); returns an unregister function"""
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
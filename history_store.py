@@ -0,0 +1,165 @@
+"""Read access to users' analysis history in the Supabase stock_analyses table.
+
+Pages are fetched by keyset (cursor) pagination on (created_at, id) so each
+page costs the same however deep into a history it is; listings leave out
+the large analysis column. Usage: python history_store.py USER_ID [--latest] [--cursor C]
+"""
+import base64
+import datetime
+import json
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Columns returned when listing; the analysis JSONB column is only read by get()/latest()
+LIST_COLUMNS = ('id', 'ticker', 'stock_data', 'is_favorite', 'created_at')
+FULL_COLUMNS = LIST_COLUMNS + ('analysis', 'updated_at')
+MAX_PAGE_SIZE = 100
+
+
+class HistoryPage(NamedTuple):
+    items: List[Dict]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque cursor pointing just past a row"""
+    raw = json.dumps([row['created_at'], row['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(created_at, id) of a cursor; both are checked since they end up in the query filter"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        datetime.datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(row_id))
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid history cursor") from e
+
+
+class AnalysisHistory:
+    """Keyset-paginated queries over stock_analyses through Supabase's REST API.
+
+    Every per-user query filters on user_id explicitly, so it is safe with the
+    service role key as well as with a user's token under row level security;
+    changes() scans all users for indexing. Pages
+    are ordered newest first and rely on the (user_id, created_at DESC, id
+    DESC) indexes from database-setup.sql; latest_per_ticker reads the
+    trigger-maintained latest_stock_analyses table, so its pages cost the
+    same as those of list().
+    """
+
+    def __init__(self, base_url: str, api_key: str, access_token: Optional[str] = None,
+                 timeout: float = 10.0):
+        self.endpoint = base_url.rstrip('/') + '/rest/v1/'
+        self.headers = {
+            'apikey': api_key,
+            'Authorization': f"Bearer {access_token or api_key}",
+            'Accept': 'application/json',
+        }
+        self.timeout = timeout
+
+    def _select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict]:
+        import requests  # Deferred so the app does not load it until history is read
+        response = requests.get(self.endpoint + table, params=params, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _page(self, table: str, columns: Tuple[str, ...], filters: List[Tuple[str, str]],
+              limit: int, cursor: Optional[str]) -> HistoryPage:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        params = [('select', ','.join(columns))] + filters
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            # Rows strictly after the cursor in (created_at DESC, id DESC) order
+            params.append(('or', f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id}))'))
+        # One extra row tells whether another page exists
+        params += [('order', 'created_at.desc,id.desc'), ('limit', str(limit + 1))]
+
+        rows = self._select(table, params)
+        items = rows[:limit]
+        next_cursor = encode_cursor(items[-1]) if len(rows) > limit else None
+        return HistoryPage(items, next_cursor)
+
+    def list(self, user_id: str, limit: int = 20, cursor: Optional[str] = None,
+             ticker: Optional[str] = None, favorites_only: bool = False) -> HistoryPage:
+        """One page of a user's analyses, newest first, without the analysis column"""
+        filters = [('user_id', f'eq.{user_id}')]
+        if ticker:
+            filters.append(('ticker', f'eq.{ticker}'))
+        if favorites_only:
+            filters.append(('is_favorite', 'is.true'))
+        return self._page('stock_analyses', LIST_COLUMNS, filters, limit, cursor)
+
+    def latest_per_ticker(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> HistoryPage:
+        """One page of the user's most recent analysis of each ticker, newest first, without the analysis column"""
+        return self._page('latest_stock_analyses', LIST_COLUMNS, [('user_id', f'eq.{user_id}')], limit, cursor)
+
+    def latest(self, user_id: str, ticker: str) -> Optional[Dict]:
+        """The user's most recent full analysis of one ticker, or None"""
+        rows = self._select('stock_analyses', [
+            ('select', ','.join(FULL_COLUMNS)),
+            ('user_id', f'eq.{user_id}'),
+            ('ticker', f'eq.{ticker}'),
+            ('order', 'created_at.desc,id.desc'),
+            ('limit', '1'),
+        ])
+        return rows[0] if rows else None
+
+    def get(self, user_id: str, analysis_id: str) -> Optional[Dict]:
+        """One full analysis row by id, or None"""
+        rows = self._select('stock_analyses', [
+            ('select', ','.join(FULL_COLUMNS)),
+            ('user_id', f'eq.{user_id}'),
+            ('id', f'eq.{analysis_id}'),
+        ])
+        return rows[0] if rows else None
+
+    def changes(self, cursor: Optional[str] = None, limit: int = MAX_PAGE_SIZE) -> HistoryPage:
+        """One page of every user's full analyses created after the cursor, oldest first.
+
+        Meant for indexers (see report_index.py), so it is not scoped to a user
+        and needs the service role key. next_cursor points past the last row
+        returned, or is the given cursor when there are none, so it can be
+        kept to pick up rows created later; a page shorter than limit is the
+        last one for now.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        params = [('select', ','.join(FULL_COLUMNS + ('user_id',)))]
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            params.append(('or', f'(created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{row_id}))'))
+        params += [('order', 'created_at.asc,id.asc'), ('limit', str(limit))]
+
+        rows = self._select('stock_analyses', params)
+        return HistoryPage(rows, encode_cursor(rows[-1]) if rows else cursor)
+
+
+def create_history_store(config) -> Optional[AnalysisHistory]:
+    """History store for the configured Supabase project, or None if it is not configured"""
+    if not config.supabase_url or not config.supabase_key:
+        return None
+    return AnalysisHistory(config.supabase_url, config.supabase_key)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("user_id")
+    parser.add_argument("--latest", action="store_true", help="Latest analysis per ticker")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cursor")
+    args = parser.parse_args()
+
+    store = create_history_store(get_config())
+    if store is None:
+        parser.error("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or the NEXT_PUBLIC_ variants) are not set")
+    query = store.latest_per_ticker if args.latest else store.list
+    page = query(args.user_id, limit=args.limit, cursor=args.cursor)
+    for row in page.items:
+        print(f"{row['created_at']}  {row['ticker']:<12} {row['id']}")
+    if page.next_cursor:
+        print(f"next: --cursor {page.next_cursor}")
@@ -0,0 +1,235 @@
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from instruments import instrument_id
+from price_history import PriceHistoryStore
+
+# Bars needed for the longest indicator (SMA 200) plus headroom for EMA warm-up
+DEFAULT_LOOKBACK = 260
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average along the last axis; NaN until the window is full"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    csum = np.cumsum(values, axis=-1)
+    csum = np.concatenate([np.zeros(values.shape[:-1] + (1,)), csum], axis=-1)
+    out[..., window - 1:] = (csum[..., window:] - csum[..., :-window]) / window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling population standard deviation along the last axis"""
+    mean = sma(values, window)
+    mean_sq = sma(values * values, window)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def nan_sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Moving average over the finite values of each window; NaN where a window has none"""
+    valid = np.isfinite(values)
+    sums = sma(np.where(valid, values, 0.0), window)
+    counts = sma(valid.astype(np.float64), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def nan_rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling population standard deviation over the finite values of each window"""
+    mean = nan_sma(values, window)
+    mean_sq = nan_sma(values * values, window)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def ema(values: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average along the last axis, vectorized across rows"""
+    if alpha is None:
+        alpha = 2.0 / (span + 1)
+    out = np.empty(values.shape)
+    out[..., 0] = values[..., 0]
+    for t in range(1, values.shape[-1]):
+        out[..., t] = alpha * values[..., t] + (1 - alpha) * out[..., t - 1]
+    return out
+
+
+def rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing"""
+    delta = np.diff(closes, axis=-1, prepend=closes[..., :1])
+    gains = ema(np.clip(delta, 0, None), alpha=1.0 / period)
+    losses = ema(np.clip(-delta, 0, None), alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gains / losses
+        return np.where(losses == 0, 100.0, 100 - 100 / (1 + rs))
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling maximum along the last axis, aligned to the window end"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).max(axis=-1)
+    return out
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """Rolling minimum along the last axis, aligned to the window end"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(values, window, axis=-1).min(axis=-1)
+    return out
+
+
+def _stack_tail(series_list, column, lookback):
+    """Stack the last `lookback` bars of each series, edge-padding short histories.
+
+    Price gaps are filled from the last valid price, and leading gaps from
+    the first one, so a NaN never reaches the moving averages; missing
+    volume stays NaN and is skipped by the volume statistics.
+    """
+    matrix = np.empty((len(series_list), lookback))
+    for row, series in enumerate(series_list):
+        tail = np.asarray(series[column][-lookback:], dtype=np.float64)
+        if column != 'volume' and np.isnan(tail).any():
+            valid = ~np.isnan(tail)
+            first = int(np.argmax(valid))
+            tail = tail[np.maximum.accumulate(np.where(valid, np.arange(len(tail)), first))]
+        matrix[row, lookback - len(tail):] = tail
+        matrix[row, :lookback - len(tail)] = tail[0] if len(tail) else np.nan
+    return matrix
+
+
+def compute_indicators(store: PriceHistoryStore, tickers: Iterable[str],
+                       lookback: int = DEFAULT_LOOKBACK) -> Dict[str, Dict]:
+    """Compute the latest indicator values for every ticker with local history"""
+    tickers = [instrument_id(t) for t in tickers]
+    series_list, found = [], []
+    for ticker in tickers:
+        series = store.get(ticker)
+        if series is not None and len(series['close']) > 1:
+            series_list.append(series)
+            found.append(ticker)
+    if not found:
+        return {}
+
+    closes = _stack_tail(series_list, 'close', lookback)
+    highs = _stack_tail(series_list, 'high', lookback)
+    lows = _stack_tail(series_list, 'low', lookback)
+    volumes = _stack_tail(series_list, 'volume', lookback)
+    # Fall back to closes where high/low columns were not supplied
+    highs = np.where(np.isnan(highs), closes, highs)
+    lows = np.where(np.isnan(lows), closes, lows)
+    bars = np.array([min(len(series['close']), lookback) for series in series_list])
+
+    ema12, ema26 = ema(closes, 12), ema(closes, 26)
+    macd = ema12 - ema26
+    signal = ema(macd, 9)
+    mid = sma(closes, 20)
+    band = 2 * rolling_std(closes, 20)
+    vol_mean = nan_sma(volumes, 20)
+    vol_std = nan_rolling_std(volumes, 20)
+
+    latest = {
+        'close': closes[:, -1],
+        'sma_20': sma(closes, 20)[:, -1],
+        'sma_50': sma(closes, 50)[:, -1],
+        'sma_200': sma(closes, 200)[:, -1],
+        'ema_12': ema12[:, -1],
+        'ema_26': ema26[:, -1],
+        'rsi_14': rsi(closes, 14)[:, -1],
+        'macd': macd[:, -1],
+        'macd_signal': signal[:, -1],
+        'macd_hist': (macd - signal)[:, -1],
+        'bb_mid': mid[:, -1],
+        'bb_upper': (mid + band)[:, -1],
+        'bb_lower': (mid - band)[:, -1],
+        'support_20': rolling_min(lows, 20)[:, -1],
+        'resistance_20': rolling_max(highs, 20)[:, -1],
+        'support_52w': lows[:, -252:].min(axis=1),
+        'resistance_52w': highs[:, -252:].max(axis=1),
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # NaN when the latest volume or every volume in the window is missing
+        latest['volume_z'] = np.where(vol_std[:, -1] == 0, 0.0, (volumes[:, -1] - vol_mean[:, -1]) / vol_std[:, -1])
+
+    # Indicators whose window exceeds the available history are unreliable
+    min_bars = {'sma_20': 20, 'sma_50': 50, 'sma_200': 200, 'ema_26': 26, 'rsi_14': 15,
+                'macd': 35, 'macd_signal': 35, 'macd_hist': 35, 'bb_mid': 20, 'bb_upper': 20,
+                'bb_lower': 20, 'support_20': 20, 'resistance_20': 20, 'volume_z': 20}
+    for name, needed in min_bars.items():
+        latest[name] = np.where(bars >= needed, latest[name], np.nan)
+
+    results = {}
+    for row, ticker in enumerate(found):
+        values = {name: float(column[row]) for name, column in latest.items()}
+        values['as_of'] = str(np.datetime64(int(series_list[row]['timestamp'][-1]), 's'))[:10]
+        values['trend'] = _classify_trend(values)
+        results[ticker] = values
+    return results
+
+
+def _classify_trend(values: Dict) -> str:
+    """Label the trend from the close and its moving averages"""
+    close, sma_50, sma_200 = values['close'], values['sma_50'], values['sma_200']
+    if np.isnan(sma_50):
+        return "Insufficient history"
+    if np.isnan(sma_200):
+        return "Uptrend" if close > sma_50 else "Downtrend"
+    if close > sma_50 > sma_200:
+        return "Uptrend"
+    if close < sma_50 < sma_200:
+        return "Downtrend"
+    return "Sideways"
+
+
+def _fmt(value: float, prefix: str = "", digits: int = 2) -> str:
+    return "N/A" if np.isnan(value) else f"{prefix}{value:,.{digits}f}"
+
+
+def format_indicators_for_prompt(values: Dict, currency: str = "$") -> str:
+    """Compact hard-number block to inject into the analysis prompt"""
+    return (
+        f"Locally computed technicals (daily bars, as of {values['as_of']}):\n"
+        f"Close {_fmt(values['close'], currency)}; trend {values['trend']}; "
+        f"SMA20/50/200 {_fmt(values['sma_20'], currency)}/{_fmt(values['sma_50'], currency)}/{_fmt(values['sma_200'], currency)}; "
+        f"RSI14 {_fmt(values['rsi_14'], digits=1)}; "
+        f"MACD {_fmt(values['macd'])} signal {_fmt(values['macd_signal'])} hist {_fmt(values['macd_hist'])}; "
+        f"Bollinger20 {_fmt(values['bb_lower'], currency)}-{_fmt(values['bb_upper'], currency)}; "
+        f"support/resistance 20d {_fmt(values['support_20'], currency)}/{_fmt(values['resistance_20'], currency)}, "
+        f"52w {_fmt(values['support_52w'], currency)}/{_fmt(values['resistance_52w'], currency)}; "
+        f"volume z-score {_fmt(values['volume_z'], digits=1)}"
+    )
+
+
+def format_indicators_markdown(values: Dict, currency: str = "$") -> str:
+    """Render the Technical Analysis report section directly from indicator values"""
+    return f"""## 🔍 Technical Analysis
+- **Price Trend:** **{values['trend']}** — close {_fmt(values['close'], currency)} vs SMA 20/50/200 at {_fmt(values['sma_20'], currency)} / {_fmt(values['sma_50'], currency)} / {_fmt(values['sma_200'], currency)}
+- **Support/Resistance:** 20-day **{_fmt(values['support_20'], currency)}** / **{_fmt(values['resistance_20'], currency)}**; 52-week {_fmt(values['support_52w'], currency)} / {_fmt(values['resistance_52w'], currency)}
+- **Technical Indicators:** RSI(14) **{_fmt(values['rsi_14'], digits=1)}**, MACD {_fmt(values['macd'])} (signal {_fmt(values['macd_signal'])}), Bollinger(20, 2σ) {_fmt(values['bb_lower'], currency)} – {_fmt(values['bb_upper'], currency)}
+- **Volume Analysis:** latest volume z-score **{_fmt(values['volume_z'], digits=1)}** vs 20-day average
+
+*Computed locally from daily price history as of {values['as_of']}.*
+"""
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description="Compute technical indicators for a watchlist")
+    parser.add_argument("tickers", nargs="*", help="Tickers to compute (default: every stored ticker)")
+    args = parser.parse_args()
+
+    store = PriceHistoryStore(get_config().price_history_dir)
+    tickers = args.tickers or (sorted(os.listdir(store.root_dir)) if os.path.isdir(store.root_dir) else [])
+    start = time.perf_counter()
+    results = compute_indicators(store, tickers)
+    elapsed = (time.perf_counter() - start) * 1000
+    for ticker, values in results.items():
+        print(f"{ticker}: {format_indicators_for_prompt(values)}")
+    print(f"\n{len(results)} tickers in {elapsed:.1f} ms")
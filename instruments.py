@@ -0,0 +1,74 @@
+import re
+from functools import lru_cache
+from typing import Tuple
+
+# Common Indian stock tickers
+INDIAN_STOCKS = frozenset({
+    # Major Indian companies
+    'RELIANCE', 'TCS', 'HDFCBANK', 'INFY', 'HINDUNILVR', 'ICICIBANK', 'ITC',
+    'SBIN', 'BHARTIARTL', 'KOTAKBANK', 'LT', 'ASIANPAINT', 'AXISBANK', 'MARUTI',
+    'BAJFINANCE', 'HCLTECH', 'WIPRO', 'ULTRACEMCO', 'DMART', 'BAJAJFINSV',
+    'TITAN', 'NESTLEIND', 'POWERGRID', 'TATAMOTORS', 'TECHM', 'SUNPHARMA',
+    'JSWSTEEL', 'TATASTEEL', 'INDUSINDBK', 'ADANIENT', 'BPCL', 'GRASIM',
+    'COALINDIA', 'ONGC', 'NTPC', 'DRREDDY', 'APOLLOHOSP', 'BAJAJ-AUTO',
+    'CIPLA', 'EICHERMOT', 'DIVISLAB', 'HEROMOTOCO', 'BRITANNIA', 'SHREECEM',
+    'PIDILITIND', 'GODREJCP', 'BERGEPAINT', 'DABUR', 'AMBUJACEM', 'BANDHANBNK',
+    'MCDOWELL-N', 'TATACONSUM', 'CHOLAFIN', 'GAIL', 'SIEMENS', 'DLF',
+    'ZEEL', 'VEDL', 'CADILAHC', 'LUPIN', 'MARICO', 'BIOCON', 'MUTHOOTFIN',
+    'PAGEIND', 'AUROPHARMA', 'TORNTPHARM', 'COLPAL', 'HDFCLIFE', 'SBILIFE',
+    'ICICIPRULI', 'BAJAJHLDNG', 'MINDTREE', 'MPHASIS', 'PERSISTENT'
+})
+
+# NSE and BSE listing suffixes; every one resolves to the NSE listing
+INDIAN_SUFFIXES = ('.NSE', '.BSE', '.NS', '.BO')
+CANONICAL_INDIAN_SUFFIX = '.NS'
+
+
+def is_indian_symbol(ticker: str) -> bool:
+    """Determine if a stock ticker is from Indian market"""
+    ticker_upper = ticker.upper()
+    if ticker_upper in INDIAN_STOCKS:
+        return True
+    if ticker_upper.endswith(INDIAN_SUFFIXES):
+        return True
+    # Indian sector ETFs and index funds
+    return 'NIFTY' in ticker_upper or 'SENSEX' in ticker_upper
+
+
+@lru_cache(maxsize=4096)
+def resolve_ticker(ticker: str) -> Tuple[bool, str]:
+    """Resolve user input to a canonical instrument ID; returns (is_valid, ID or error message).
+
+    Case and surrounding whitespace are ignored, and the .NS/.BO/.NSE/.BSE
+    listings of an Indian company share one ID: the bare symbol when it is
+    recognized as Indian on its own (RELIANCE.BO -> RELIANCE), otherwise
+    the symbol with the .NS suffix (SMALLCAP.BO -> SMALLCAP.NS) so the
+    exchange stays known.
+    """
+    if not ticker or not ticker.strip():
+        return False, "Ticker cannot be empty"
+
+    ticker = ticker.strip().upper()
+    if not re.match(r'^[A-Z0-9][A-Z0-9.-]*$', ticker):
+        return False, "Ticker contains invalid characters"
+
+    symbol = ticker
+    for suffix in INDIAN_SUFFIXES:
+        if ticker.endswith(suffix):
+            symbol = ticker[:-len(suffix)]
+            break
+
+    if len(symbol) < 1 or len(symbol) > 10:
+        return False, "Ticker length should be between 1-10 characters"
+
+    if symbol == ticker or is_indian_symbol(symbol):
+        return True, symbol
+    return True, symbol + CANONICAL_INDIAN_SUFFIX
+
+
+def instrument_id(ticker: str) -> str:
+    """Canonical instrument ID for a ticker; raises ValueError for invalid tickers"""
+    is_valid, result = resolve_ticker(ticker)
+    if not is_valid:
+        raise ValueError(f"Invalid ticker format: {result}")
+    return result
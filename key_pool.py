@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from deadline import Deadline, DeadlineExceeded
+
+# Status recorded for calls the client abandoned; they say nothing about the key's health
+CLIENT_CLOSED_REQUEST = 499
+
+
+class _KeyState:
+    """Usage and health of one API key"""
+
+    __slots__ = ('key', 'label', 'in_flight', 'recent', 'latency', 'calls', 'rate_limited',
+                 'failures', 'consecutive_failures', 'cooldown', 'cooling_until')
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+        self.in_flight = 0
+        # Start times of the calls made within the last minute
+        self.recent = deque()
+        self.latency = None
+        self.calls = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown = 0.0
+        self.cooling_until = 0.0
+
+
+class ApiKeyPool:
+    """Spread API calls across several keys and sideline unhealthy ones.
+
+    acquire() picks the available key with the most headroom: keys that
+    are cooling down or have used their requests-per-minute budget are
+    skipped, and among the rest the one with the fewest calls in flight
+    and in the last minute wins, ties going to the lower smoothed latency.
+    A 429 sidelines a key for its Retry-After (or a doubling cooldown), and
+    so do repeated failures. When every key is unavailable, acquire()
+    waits for the first one to free up, within the caller's deadline.
+    """
+
+    def __init__(self, keys: List[str], requests_per_minute: Optional[int] = None,
+                 cooldown: float = 60.0, max_cooldown: float = 900.0,
+                 failure_threshold: int = 3, smoothing: float = 0.2):
+        if not keys:
+            raise ValueError("No API keys configured")
+        self.requests_per_minute = requests_per_minute
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = failure_threshold
+        self.smoothing = smoothing
+        self._states = {
+            key: _KeyState(key, f"key{index + 1}…{key[-4:]}")
+            for index, key in enumerate(dict.fromkeys(keys))
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _available_at(self, state: _KeyState, now: float) -> float:
+        """When the key may next be used: end of its cooldown or of its full rate window"""
+        available = state.cooling_until
+        if self.requests_per_minute and len(state.recent) >= self.requests_per_minute:
+            available = max(available, state.recent[0] + 60.0)
+        return available
+
+    def acquire(self, exclude: tuple = (), deadline: Optional[Deadline] = None) -> str:
+        """Reserve the key to use for the next call; pass it back to release() afterwards.
+
+        Waits while every key is cooling down or out of budget. Raises
+        DeadlineExceeded (or Cancelled) at once when no key frees up before
+        the deadline, and when the deadline is cancelled during the wait.
+        """
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                candidates = [state for key, state in self._states.items() if key not in exclude] \
+                    or list(self._states.values())
+                for state in candidates:
+                    while state.recent and state.recent[0] <= now - 60.0:
+                        state.recent.popleft()
+                ready = [state for state in candidates if self._available_at(state, now) <= now]
+                if ready:
+                    state = min(ready, key=lambda s: (s.in_flight + len(s.recent), s.latency or 0.0))
+                    state.in_flight += 1
+                    state.recent.append(now)
+                    return state.key
+                wait = min(self._available_at(state, now) for state in candidates) - now
+            if deadline is not None:
+                if wait > deadline.timeout():
+                    raise DeadlineExceeded(f"No API key has budget within the {deadline.seconds:g}s deadline")
+                # Sliced so a cancelled deadline ends the wait early
+                wait = min(wait, 0.25)
+            time.sleep(wait)
+
+    def available_in(self) -> float:
+        """Seconds until some key can take a call within its budget; 0 when one can now"""
+        now = time.monotonic()
+        with self._lock:
+            for state in self._states.values():
+                while state.recent and state.recent[0] <= now - 60.0:
+                    state.recent.popleft()
+            return max(0.0, min(self._available_at(state, now) for state in self._states.values()) - now)
+
+    def release(self, key: str, latency: float, status: Optional[int],
+                retry_after: Optional[str] = None) -> None:
+        """Record a call's outcome; status is the HTTP status, None when the request itself failed"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states[key]
+            state.in_flight -= 1
+            state.calls += 1
+            if status == CLIENT_CLOSED_REQUEST:
+                return
+            if status == 429:
+                state.rate_limited += 1
+                state.cooldown = min(self.max_cooldown, state.cooldown * 2 or self.base_cooldown)
+                state.cooling_until = now + (_parse_retry_after(retry_after) or state.cooldown)
+                return
+            if status is None or status >= 500 or status in (401, 403):
+                state.failures += 1
+                state.consecutive_failures += 1
+                if state.consecutive_failures >= self.failure_threshold:
+                    state.cooldown = min(self.max_cooldown, state.cooldown * 2 or self.base_cooldown)
+                    state.cooling_until = now + state.cooldown
+                return
+            state.consecutive_failures = 0
+            state.cooldown = 0.0
+            state.latency = latency if state.latency is None else (
+                self.smoothing * latency + (1 - self.smoothing) * state.latency
+            )
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-key usage and health, keyed by a label that does not reveal the key"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                state.label: {
+                    'calls': state.calls,
+                    'last_minute': sum(1 for started in state.recent if started > now - 60.0),
+                    'in_flight': state.in_flight,
+                    'rate_limited': state.rate_limited,
+                    'failures': state.failures,
+                    'latency': None if state.latency is None else round(state.latency, 3),
+                    'cooling_for': round(max(0.0, state.cooling_until - now), 1),
+                }
+                for state in self._states.values()
+            }
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given in seconds; HTTP dates fall back to the cooldown"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
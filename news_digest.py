@@ -0,0 +1,113 @@
+"""Streaming news digest: normalize, drop near-duplicate stories, format [Ref: url] lines.
+
+Every stage is a generator over the incoming items, so memory stays
+constant however many items are streamed through: only the last `window`
+signatures and the emitted lines are held.
+"""
+import hashlib
+import re
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+
+# MinHash permutations h(x) = (a * x + b) mod p over 32-bit shingle hashes,
+# drawn once with a fixed seed; products stay within uint64
+_PRIME = 4294967311
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 32, size=64, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=64, dtype=np.uint64)
+# Signatures sharing any band of this many rows are compared in full
+BAND_ROWS = 4
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Overlapping word n-grams of the lowercased text (the words themselves if shorter)"""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """MinHash signature of the text's word shingles"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+         for shingle in shingles(text)),
+        dtype=np.uint64
+    )
+    if not len(hashes):
+        hashes = np.zeros(1, dtype=np.uint64)
+    return tuple(((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0).tolist())
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def normalize_items(items: Iterable[Dict], title_length: int = 100,
+                    content_length: int = 300) -> Iterator[Dict]:
+    """Yield {title, content, url} items with whitespace collapsed and text truncated"""
+    from utils import DataProcessor  # utils delegates create_news_summary to this module
+
+    for item in items:
+        yield {
+            'title': DataProcessor.clean_and_truncate_text(item.get('title') or 'No title', title_length),
+            'content': DataProcessor.clean_and_truncate_text(item.get('content') or 'No content', content_length),
+            'url': (item.get('url') or '#').strip(),
+        }
+
+
+def drop_near_duplicates(items: Iterable[Dict], threshold: float = 0.6, window: int = 256) -> Iterator[Dict]:
+    """Yield items whose title and content are less than `threshold` similar to every recently kept item.
+
+    Syndicated copies of a story carry mostly the same text under different
+    URLs and bylines, so they are compared by the MinHash of their word
+    shingles. Signatures are bucketed by band (locality-sensitive hashing)
+    so each item is only compared with kept items sharing a band; only the
+    last `window` kept items are remembered.
+    """
+    recent = deque()
+    buckets = {}
+    for item in items:
+        fingerprint = minhash(f"{item['title']} {item['content']}")
+        bands = [(i, fingerprint[i:i + BAND_ROWS]) for i in range(0, len(fingerprint), BAND_ROWS)]
+        candidates = {seen for band in bands for seen in buckets.get(band, ())}
+        if any(similarity(fingerprint, seen) >= threshold for seen in candidates):
+            continue
+
+        recent.append((fingerprint, bands))
+        for band in bands:
+            buckets.setdefault(band, []).append(fingerprint)
+        if len(recent) > window:
+            # Forget the oldest kept item
+            evicted, evicted_bands = recent.popleft()
+            for band in evicted_bands:
+                bucket = buckets[band]
+                bucket.remove(evicted)
+                if not bucket:
+                    del buckets[band]
+        yield item
+
+
+def digest_lines(items: Iterable[Dict], max_items: int = 5) -> Iterator[Tuple[str, Dict]]:
+    """Yield (line, reference) pairs for the first max_items distinct stories"""
+    distinct = drop_near_duplicates(normalize_items(items))
+    for idx, item in enumerate(islice(distinct, max_items), 1):
+        yield (
+            f"{idx}. {item['title']}: {item['content']} [Ref: {item['url']}]",
+            {'index': idx, 'url': item['url'], 'title': item['title']},
+        )
+
+
+def build_news_digest(items: Iterable[Dict], max_items: int = 5) -> Tuple[str, List[Dict]]:
+    """Return the numbered [Ref: url] digest and its references; items may be any iterable"""
+    lines, references = [], []
+    for line, reference in digest_lines(items, max_items):
+        lines.append(line)
+        references.append(reference)
+    if not lines:
+        return "No recent news found.", []
+    return '\n'.join(lines) + '\n', references
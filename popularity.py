@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+
+class RequestCounter:
+    """Decaying per-ticker request counts, kept in the analyzer cache so replicas add up.
+
+    Requests are counted in process and merged into the cache entry at most
+    once per flush_interval. Counts halve every half_life seconds, so the
+    ranking follows current interest. Merges from different replicas can
+    race and lose a flush; for ranking a skewed top-N that is harmless.
+    """
+
+    def __init__(self, cache, key: str = "request_counts", half_life: float = 7 * 86400,
+                 flush_interval: float = 60.0):
+        self.cache = cache
+        self.key = key
+        self.half_life = half_life
+        self.flush_interval = flush_interval
+        self._pending = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, ticker: str) -> None:
+        """Count one request for a canonical ticker"""
+        with self._lock:
+            self._pending[ticker] += 1
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def _decayed(self, now: float) -> dict:
+        entry = self.cache.get(self.key) or {}
+        factor = 0.5 ** (max(0.0, now - entry.get('updated_at', now)) / self.half_life)
+        return {ticker: count * factor for ticker, count in entry.get('counts', {}).items()}
+
+    def flush(self) -> None:
+        """Merge the requests counted since the last flush into the shared counts"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        counts = self._decayed(now)
+        for ticker, count in pending.items():
+            counts[ticker] = counts.get(ticker, 0.0) + count
+        # Forget tickers nobody has asked for in a long time
+        counts = {ticker: round(count, 3) for ticker, count in counts.items() if count >= 0.01}
+        self.cache.set(self.key, {'updated_at': now, 'counts': counts}, ttl=8 * self.half_life)
+
+    def top(self, n: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """The n most requested tickers with their decayed counts, most requested first"""
+        counts = self._decayed(time.time() if now is None else now)
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:n]
@@ -0,0 +1,242 @@
+import csv
+import datetime
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from instruments import instrument_id
+
+# Column layout of a stored series; each column is one .npy file
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+# Accepted CSV header spellings for each column (Yahoo Finance, NSE and generic exports)
+_CSV_ALIASES = {
+    'timestamp': ('date', 'datetime', 'timestamp', 'time'),
+    'open': ('open', 'open price'),
+    'high': ('high', 'high price'),
+    'low': ('low', 'low price'),
+    'close': ('close', 'close price', 'adj close', 'last'),
+    'volume': ('volume', 'total traded quantity', 'shares traded'),
+}
+
+# Non-ISO date formats of exchange exports, e.g. 18-Oct-2024 in NSE history and bhavcopy files
+_DATE_FORMATS = ('%d-%b-%Y', '%d-%b-%Y %H:%M:%S', '%d-%m-%Y')
+
+# File naming the live version directory of a series
+_CURRENT = 'CURRENT'
+
+
+def parse_dates(values: List[str]) -> np.ndarray:
+    """Parse ISO dates/datetimes or NSE-style dates (18-Oct-2024) to datetime64[s]"""
+    try:
+        return np.array([value[:19] for value in values], dtype='datetime64[s]')
+    except ValueError:
+        pass
+    for date_format in _DATE_FORMATS:
+        try:
+            return np.array([datetime.datetime.strptime(value, date_format) for value in values], dtype='datetime64[s]')
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date format: {values[0]!r}")
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices of the kept points"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and the next bucket's mean
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(np.argmax(areas))
+        indices[bucket + 1] = previous
+
+    return indices
+
+
+class PriceHistoryStore:
+    """Columnar per-ticker OHLCV store backed by memory-mapped .npy files.
+
+    Each write goes to a new version directory holding every column; the
+    CURRENT file then switches readers to it in one rename, so columns never
+    mix versions and other processes see the change on their next get().
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._series = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root_dir, instrument_id(ticker))
+
+    def _version(self, key: str) -> Optional[str]:
+        """Live version directory of a series; '' for the flat layout of older stores, None if missing"""
+        ticker_dir = self._ticker_dir(key)
+        try:
+            with open(os.path.join(ticker_dir, _CURRENT), encoding='utf-8') as handle:
+                return handle.read().strip()
+        except FileNotFoundError:
+            return '' if os.path.exists(os.path.join(ticker_dir, 'close.npy')) else None
+
+    def has(self, ticker: str) -> bool:
+        """Check whether a series exists for the ticker"""
+        return self._version(instrument_id(ticker)) is not None
+
+    def get(self, ticker: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return the full series as memory-mapped column arrays, or None if missing"""
+        key = instrument_id(ticker)
+        while True:
+            version = self._version(key)
+            if version is None:
+                return None
+            cached = self._series.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            version_dir = os.path.join(self._ticker_dir(key), version)
+            try:
+                series = {
+                    column: np.load(os.path.join(version_dir, f'{column}.npy'), mmap_mode='r')
+                    for column in COLUMNS
+                }
+            except FileNotFoundError:
+                # Superseded and removed by a concurrent write; read the new version
+                continue
+            with self._lock:
+                self._series[key] = (version, series)
+            return series
+
+    def write(self, ticker: str, columns: Dict[str, np.ndarray]) -> int:
+        """Merge rows into a ticker's series (new rows win on equal timestamps); returns the row count"""
+        key = instrument_id(ticker)
+        timestamps = np.asarray(columns['timestamp'], dtype='datetime64[s]').astype(np.int64)
+        new = {'timestamp': timestamps}
+        for column in COLUMNS[1:]:
+            new[column] = np.asarray(columns.get(column, np.full(len(timestamps), np.nan)), dtype=np.float64)
+
+        with self._write_lock:
+            previous = self._version(key)
+            existing = self.get(key)
+            if existing is not None:
+                new = {column: np.concatenate([np.asarray(existing[column]), new[column]]) for column in COLUMNS}
+
+            # Sort by time and keep the last occurrence of each timestamp
+            order = np.argsort(new['timestamp'], kind='stable')
+            sorted_ts = new['timestamp'][order]
+            keep = np.append(sorted_ts[1:] != sorted_ts[:-1], True)
+            order = order[keep]
+
+            ticker_dir = self._ticker_dir(key)
+            version = f"v{time.time_ns()}-{os.getpid()}"
+            os.makedirs(os.path.join(ticker_dir, version))
+            for column in COLUMNS:
+                np.save(os.path.join(ticker_dir, version, f'{column}.npy'), new[column][order])
+
+            # Publish every column at once
+            tmp_path = os.path.join(ticker_dir, f'{_CURRENT}.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                handle.write(version)
+            os.replace(tmp_path, os.path.join(ticker_dir, _CURRENT))
+            with self._lock:
+                self._series.pop(key, None)
+
+            # Existing mappings of the old files stay valid after removal
+            if previous:
+                shutil.rmtree(os.path.join(ticker_dir, previous), ignore_errors=True)
+            elif previous == '':
+                for column in COLUMNS:
+                    try:
+                        os.remove(os.path.join(ticker_dir, f'{column}.npy'))
+                    except OSError:
+                        pass
+        return len(order)
+
+    def ingest_csv(self, ticker: str, path: str) -> int:
+        """Ingest an OHLCV CSV file into the store; returns the resulting row count"""
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            reader = csv.reader(handle)
+            header = [name.strip().lower() for name in next(reader)]
+            positions = {}
+            for column, aliases in _CSV_ALIASES.items():
+                for alias in aliases:
+                    if alias in header:
+                        positions[column] = header.index(alias)
+                        break
+            if 'timestamp' not in positions or 'close' not in positions:
+                raise ValueError(f"{path}: CSV needs at least a date and a close column")
+
+            rows = [row for row in reader if row and row[positions['timestamp']].strip()]
+
+        columns = {'timestamp': parse_dates([row[positions['timestamp']].strip() for row in rows])}
+        for column in COLUMNS[1:]:
+            if column in positions:
+                values = [row[positions[column]].replace(',', '').strip() for row in rows]
+                columns[column] = np.array([float(v) if v not in ('', 'null', '-') else np.nan for v in values])
+        return self.write(ticker, columns)
+
+    def query(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None,
+              max_points: int = 2000) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return (dates, closes) for a date range, LTTB-downsampled to at most max_points"""
+        series = self.get(ticker)
+        if series is None:
+            return None
+
+        timestamps = series['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, np.datetime64(start, 's').astype(np.int64)))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, np.datetime64(end, 's').astype(np.int64), side='right'))
+        timestamps = np.asarray(timestamps[lo:hi])
+        closes = np.asarray(series['close'][lo:hi])
+
+        valid = ~np.isnan(closes)
+        timestamps, closes = timestamps[valid], closes[valid]
+        if len(timestamps) == 0:
+            return None
+
+        keep = lttb(timestamps, closes, max_points)
+        return timestamps[keep].astype('datetime64[s]'), closes[keep]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description="Ingest OHLCV CSV files into the price history store")
+    parser.add_argument("paths", nargs="+", help="CSV files named <TICKER>.csv, or directories of them")
+    parser.add_argument("--ticker", help="Ticker to use for a single CSV file")
+    args = parser.parse_args()
+
+    store = PriceHistoryStore(get_config().price_history_dir)
+    files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith('.csv'))
+        else:
+            files.append(path)
+
+    for path in files:
+        ticker = args.ticker if args.ticker and len(files) == 1 else os.path.splitext(os.path.basename(path))[0]
+        rows = store.ingest_csv(ticker, path)
+        print(f"{instrument_id(ticker)}: {rows} rows")
@@ -0,0 +1,69 @@
+import cProfile
+import datetime
+import os
+import pstats
+import re
+import threading
+
+
+class ProfileSession:
+    """Deterministic profile of one analysis run, written as a pstats file tagged with the ticker.
+
+    The calling thread is profiled for the whole `with` block; work handed to
+    other threads is profiled too when it is wrapped with wrap(), and the
+    per-thread profiles are merged into the one output file. Open the file
+    with `python -m pstats`, snakeviz, or convert it to a flame graph with
+    flameprof or gprof2dot.
+
+    Python 3.12+ allows one active profiler per process. There the session
+    profile already sees every thread, and a session started while another
+    one is active is skipped (its path stays None).
+    """
+
+    def __init__(self, ticker: str, directory: str):
+        self.ticker = re.sub(r'[^A-Za-z0-9.-]', '_', ticker.strip().upper()) or "UNKNOWN"
+        self.directory = directory
+        self.path = None
+        self._profile = cProfile.Profile()
+        self._worker_profiles = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'ProfileSession':
+        try:
+            self._profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows only one)
+            self._profile = None
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._profile is None:
+            return
+        self._profile.disable()
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            # Workers that are still running past the end of the run are not included
+            for profile in self._worker_profiles:
+                stats.add(profile)
+
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.path = os.path.join(self.directory, f"{self.ticker}-{timestamp}-{os.getpid()}.prof")
+        stats.dump_stats(self.path)
+
+    def wrap(self, fn):
+        """Wrap a callable so its run on another thread is included in this profile"""
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: the active session profile already covers this thread
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._worker_profiles.append(profile)
+        return run
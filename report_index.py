@@ -0,0 +1,466 @@
+"""In-memory inverted index over generated reports, filterable by ticker, date and rating.
+
+Every process that indexes reports (app workers, the batch runner, the
+sync command) snapshots to the same file. Snapshots merge with the file
+under a lock, so no process overwrites what another added.
+Usage: python report_index.py search "earnings beat" --rating BUY --days 7 [--latest]
+       python report_index.py sync [--tickers AAPL TCS] [--no-store]
+"""
+import contextlib
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+from array import array
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from structured_report import RATINGS
+
+logger = logging.getLogger(__name__)
+
+# Postings are array('I') of doc ids, viewed without copying as this dtype
+_POSTING_DTYPE = np.dtype(np.uintc)
+_TOKEN = re.compile(r'[a-z0-9]+(?:\.[0-9]+)?')
+_RATING = re.compile(r'Rating\W*(BUY|SELL|HOLD)\b', re.IGNORECASE)
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the this to was were will with'.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms with stopwords dropped; a plural 's' is stripped so "beats" finds "beat" """
+    terms = []
+    for word in _TOKEN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def extract_rating(text: str) -> Optional[str]:
+    """The BUY/SELL/HOLD rating of a markdown report, or None"""
+    match = _RATING.search(text or '')
+    return match.group(1).upper() if match else None
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on path + '.lock' across processes (unlocked where fcntl is unavailable)"""
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    with open(f"{path}.lock", 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _later_cursor(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    """The store cursor further along of two (see history_store.changes)"""
+    from history_store import decode_cursor
+
+    if not a or not b:
+        return a or b
+
+    def position(cursor):
+        created_at, row_id = decode_cursor(cursor)
+        return datetime.datetime.fromisoformat(created_at), row_id
+
+    return a if position(a) >= position(b) else b
+
+
+def report_key(ticker: str, fetched_at: float) -> str:
+    """Index key of a report written to the analyzer cache"""
+    return f"report:{ticker}:{fetched_at:.6f}"
+
+
+class SearchHit(NamedTuple):
+    key: str
+    ticker: str
+    created_at: float
+    rating: Optional[str]
+
+
+class ReportIndex:
+    """Incremental inverted index over reports with columnar ticker, date and rating filters.
+
+    Each report is a document with an integer id in insertion order. A term's
+    postings are the sorted ids of the documents containing it, kept in an
+    array('I') (4 bytes per posting); the report text itself is not stored.
+    Queries intersect postings smallest first with binary search and filter
+    the candidates with numpy masks over the per-document columns.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._postings = {}
+        self._tickers = []
+        self._ticker_codes = {}
+        self._keys = []
+        self._doc_ids = {}
+        self._ticker = np.zeros(capacity, dtype=np.int32)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        # 0 means unrated, otherwise 1 + the position in RATINGS
+        self._rating = np.zeros(capacity, dtype=np.int8)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        # Position in the Supabase store up to which rows are indexed (see sync_store)
+        self.store_cursor = None
+        self.unsaved = 0
+        # Modification time of the snapshot file as last read or written by this index
+        self._snapshot_mtime = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._doc_ids
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self._tickers)
+
+    def _grow(self) -> None:
+        capacity = max(1, len(self._alive)) * 2
+        for name in ('_ticker', '_created', '_rating', '_alive'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _ticker_code(self, ticker: str) -> int:
+        code = self._ticker_codes.get(ticker)
+        if code is None:
+            code = self._ticker_codes[ticker] = len(self._tickers)
+            self._tickers.append(ticker)
+        return code
+
+    def add(self, key: str, ticker: str, text: str, created_at: float, rating: Optional[str] = None) -> bool:
+        """Index one report under a unique key; returns False if the key is already indexed"""
+        terms = set(tokenize(text))
+        rating = (rating or '').upper()
+        with self._lock:
+            if key in self._doc_ids:
+                return False
+            doc_id = self._size
+            if doc_id == len(self._alive):
+                self._grow()
+            self._ticker[doc_id] = self._ticker_code(ticker)
+            self._created[doc_id] = created_at
+            self._rating[doc_id] = RATINGS.index(rating) + 1 if rating in RATINGS else 0
+            self._alive[doc_id] = True
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = array('I')
+                postings.append(doc_id)
+            self._keys.append(key)
+            self._doc_ids[key] = doc_id
+            self._size += 1
+            self.unsaved += 1
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Drop a report from results; its postings stay until the index is rebuilt"""
+        with self._lock:
+            doc_id = self._doc_ids.get(key)
+            if doc_id is None or not self._alive[doc_id]:
+                return False
+            self._alive[doc_id] = False
+            self.unsaved += 1
+            return True
+
+    def _matching(self, terms: Iterable[str]) -> np.ndarray:
+        """Ids of the documents containing every term; call with the lock held"""
+        postings = [self._postings.get(term) for term in set(terms)]
+        if any(entry is None for entry in postings):
+            return np.zeros(0, dtype=np.int64)
+        postings.sort(key=len)
+        result = np.frombuffer(postings[0], dtype=_POSTING_DTYPE).astype(np.int64)
+        for entry in postings[1:]:
+            if not len(result):
+                break
+            other = np.frombuffer(entry, dtype=_POSTING_DTYPE)
+            positions = np.minimum(np.searchsorted(other, result), len(other) - 1)
+            result = result[other[positions] == result]
+            # Release the buffer view so add() can grow the array again
+            del other
+        return result
+
+    def search(self, query: str = "", tickers: Optional[Iterable[str]] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               rating: Optional[str] = None, latest_per_ticker: bool = False,
+               limit: Optional[int] = 50) -> List[SearchHit]:
+        """Reports containing every term of query that pass the filters, newest first.
+
+        since/until bound the creation time (epoch seconds, until exclusive);
+        latest_per_ticker keeps only the newest matching report of each ticker.
+        """
+        terms = tokenize(query)
+        with self._lock:
+            ids = self._matching(terms) if terms else np.arange(self._size)
+            mask = self._alive[ids]
+            if tickers is not None:
+                codes = [self._ticker_codes[ticker] for ticker in tickers if ticker in self._ticker_codes]
+                mask &= np.isin(self._ticker[ids], codes)
+            if since is not None:
+                mask &= self._created[ids] >= since
+            if until is not None:
+                mask &= self._created[ids] < until
+            if rating:
+                rating = rating.upper()
+                mask &= self._rating[ids] == (RATINGS.index(rating) + 1 if rating in RATINGS else -1)
+            ids = ids[mask]
+            ids = ids[np.argsort(-self._created[ids], kind='stable')]
+            if latest_per_ticker:
+                _, first = np.unique(self._ticker[ids], return_index=True)
+                ids = ids[np.sort(first)]
+            if limit is not None:
+                ids = ids[:limit]
+            return [
+                SearchHit(
+                    self._keys[doc_id],
+                    self._tickers[self._ticker[doc_id]],
+                    float(self._created[doc_id]),
+                    RATINGS[self._rating[doc_id] - 1] if self._rating[doc_id] else None,
+                )
+                for doc_id in ids.tolist()
+            ]
+
+    def merge(self, other: 'ReportIndex') -> int:
+        """Add the documents of another index that this one lacks; returns how many were added.
+
+        A document removed in either index stays removed, and the store
+        cursor moves to the later of the two.
+        """
+        with self._lock:
+            remap = np.full(other._size, -1, dtype=np.int64)
+            for doc_id, key in enumerate(other._keys):
+                local = self._doc_ids.get(key)
+                if local is not None:
+                    self._alive[local] &= other._alive[doc_id]
+                    continue
+                local = self._size
+                if local == len(self._alive):
+                    self._grow()
+                self._ticker[local] = self._ticker_code(other._tickers[other._ticker[doc_id]])
+                self._created[local] = other._created[doc_id]
+                self._rating[local] = other._rating[doc_id]
+                self._alive[local] = other._alive[doc_id]
+                self._keys.append(key)
+                self._doc_ids[key] = local
+                self._size += 1
+                remap[doc_id] = local
+            added = int((remap >= 0).sum())
+            if added:
+                # New ids are above every existing one and in order, so postings stay sorted
+                for term, entry in other._postings.items():
+                    ids = remap[np.frombuffer(entry, dtype=_POSTING_DTYPE)]
+                    ids = ids[ids >= 0]
+                    if len(ids):
+                        postings = self._postings.get(term)
+                        if postings is None:
+                            postings = self._postings[term] = array('I')
+                        postings.frombytes(ids.astype(_POSTING_DTYPE).tobytes())
+            self.store_cursor = _later_cursor(self.store_cursor, other.store_cursor)
+            return added
+
+    def _merge_file(self, path: str) -> None:
+        """Merge the snapshot at path if it changed since this index last read or wrote it"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._snapshot_mtime:
+            return
+        try:
+            self.merge(self.load(path))
+        except Exception as e:
+            # A corrupt snapshot is replaced by the next one written
+            logger.warning("Ignoring unreadable report index snapshot %s: %s", path, e)
+        self._snapshot_mtime = mtime
+
+    def refresh(self, path: str) -> None:
+        """Pick up reports other processes added to the snapshot at path"""
+        with _file_lock(path):
+            self._merge_file(path)
+
+    def snapshot(self, path: str) -> None:
+        """Merge in the snapshot at path, then atomically replace it with this index"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _file_lock(path):
+            self._merge_file(path)
+            with self._lock:
+                size = self._size
+                terms = list(self._postings)
+                lengths = np.fromiter((len(self._postings[term]) for term in terms), dtype=np.int64, count=len(terms))
+                views = [np.frombuffer(self._postings[term], dtype=_POSTING_DTYPE) for term in terms]
+                postings = np.concatenate(views) if views else np.zeros(0, dtype=_POSTING_DTYPE)
+                del views
+                meta = json.dumps({
+                    'terms': terms,
+                    'tickers': self._tickers,
+                    'keys': self._keys,
+                    'store_cursor': self.store_cursor,
+                }, ensure_ascii=False)
+                columns = {name: getattr(self, f"_{name}")[:size].copy() for name in ('ticker', 'created', 'rating', 'alive')}
+                self.unsaved = 0
+
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as handle:
+                np.savez(handle, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8),
+                         lengths=lengths, postings=postings, **columns)
+            os.replace(tmp_path, path)
+            self._snapshot_mtime = os.stat(path).st_mtime_ns
+
+    @classmethod
+    def load(cls, path: str) -> 'ReportIndex':
+        """Restore an index written by snapshot()"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            lengths = data['lengths']
+            postings = data['postings'].astype(_POSTING_DTYPE, copy=False)
+            columns = {name: data[name] for name in ('ticker', 'created', 'rating', 'alive')}
+
+        size = len(meta['keys'])
+        index = cls(capacity=max(1024, size))
+        index._tickers = meta['tickers']
+        index._ticker_codes = {ticker: code for code, ticker in enumerate(index._tickers)}
+        index._keys = meta['keys']
+        index._doc_ids = {key: doc_id for doc_id, key in enumerate(index._keys)}
+        for name, column in columns.items():
+            getattr(index, f"_{name}")[:size] = column
+        index._size = size
+        index.store_cursor = meta.get('store_cursor')
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        for term, start, end in zip(meta['terms'], offsets[:-1].tolist(), offsets[1:].tolist()):
+            index._postings[term] = array('I', postings[start:end].tobytes())
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> 'ReportIndex':
+        """Load the snapshot at path; starts empty if there is none or it cannot be read"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            index = cls.load(path)
+        except FileNotFoundError:
+            return cls()
+        except Exception as e:
+            logger.warning("Ignoring unreadable report index snapshot %s: %s", path, e)
+            return cls()
+        index._snapshot_mtime = mtime
+        return index
+
+
+def _strings(value) -> Iterator[str]:
+    """Every string inside a JSON value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for element in value.values():
+            yield from _strings(element)
+    elif isinstance(value, list):
+        for element in value:
+            yield from _strings(element)
+
+
+def sync_cache(index: ReportIndex, analyzer, tickers: Iterable[str]) -> int:
+    """Index the cached report of each ticker unless it already is; returns how many were added"""
+    from instruments import resolve_ticker
+
+    added = 0
+    for ticker in tickers:
+        is_valid, ticker = resolve_ticker(ticker)
+        cached = analyzer.cached_report(ticker) if is_valid else None
+        if cached:
+            fetched_at, report = cached
+            added += index.add(report_key(ticker, fetched_at), ticker, report, fetched_at, extract_rating(report))
+    return added
+
+
+def sync_store(index: ReportIndex, history, page_size: int = 100) -> int:
+    """Index the Supabase analyses created since the last sync; returns how many were added"""
+    from instruments import resolve_ticker
+
+    added = 0
+    while True:
+        page = history.changes(index.store_cursor, page_size)
+        for row in page.items:
+            analysis = row.get('analysis') or {}
+            text = ' '.join(_strings(analysis))
+            rating = analysis.get('recommendation') if isinstance(analysis, dict) else None
+            is_valid, ticker = resolve_ticker(row['ticker'])
+            created_at = datetime.datetime.fromisoformat(row['created_at']).timestamp()
+            added += index.add(f"store:{row['id']}", ticker if is_valid else row['ticker'].upper(),
+                               text, created_at, rating or extract_rating(text))
+        index.store_cursor = page.next_cursor
+        if len(page.items) < page_size:
+            return added
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    search = commands.add_parser("search", help="Search indexed reports")
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--ticker", nargs="+")
+    search.add_argument("--rating", choices=RATINGS, type=str.upper)
+    search.add_argument("--days", type=float, help="Only reports from the last this many days")
+    search.add_argument("--latest", action="store_true", help="Only the newest matching report per ticker")
+    search.add_argument("--limit", type=int, default=20)
+    sync = commands.add_parser("sync", help="Index cached reports and new Supabase analyses, then snapshot")
+    sync.add_argument("--tickers", nargs="+", default=[], help="Tickers whose cached reports to index")
+    sync.add_argument("--no-store", action="store_true", help="Skip the Supabase stock_analyses table")
+    args = parser.parse_args()
+
+    config = get_config()
+    if args.command == "search":
+        from instruments import resolve_ticker
+
+        index = ReportIndex.open(config.report_index_path)
+        start = time.perf_counter()
+        hits = index.search(
+            args.query,
+            tickers=[result for is_valid, result in map(resolve_ticker, args.ticker) if is_valid] if args.ticker else None,
+            since=time.time() - args.days * 86400 if args.days else None,
+            rating=args.rating,
+            latest_per_ticker=args.latest,
+            limit=args.limit,
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{datetime.datetime.fromtimestamp(hit.created_at):%Y-%m-%d %H:%M}  "
+                  f"{hit.ticker:<12} {hit.rating or '-':<5} {hit.key}")
+        print(f"{len(hits)} of {len(index)} reports in {elapsed:.1f} ms")
+    else:
+        from analyzer import StockSentimentAnalyzer
+        from history_store import create_history_store
+
+        analyzer = StockSentimentAnalyzer(config.perplexity_api_key)
+        index = analyzer.report_index
+        tickers = dict.fromkeys(args.tickers + index.tickers + [ticker for ticker, _ in analyzer.popularity.top(1000)])
+        print(f"cache: {sync_cache(index, analyzer, tickers)} new reports")
+        store = None if args.no_store else create_history_store(config)
+        if store is not None:
+            print(f"store: {sync_store(index, store)} new analyses")
+        index.snapshot(config.report_index_path)
+        print(f"{len(index)} reports indexed, snapshot at {config.report_index_path}")
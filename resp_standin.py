@@ -0,0 +1,103 @@
+"""Minimal in-memory Redis-protocol server for exercising RedisBackend locally.
+
+Supports PING, AUTH, SELECT, GET, SET (with EX/PX), DEL, KEYS and FLUSHDB.
+Usage: python resp_standin.py [--port 6380]
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespStandInServer(socketserver.ThreadingTCPServer):
+    """Threaded RESP server holding one shared keyspace"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, _RespHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> 'RespStandInServer':
+        """Serve on a background thread and return self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self.lock:
+            now = time.time()
+            if command == b'PING':
+                return 'PONG'
+            if command in (b'AUTH', b'SELECT'):
+                return 'OK'
+            if command == b'GET':
+                value, expires_at = self.data.get(args[1], (None, None))
+                if expires_at is not None and expires_at <= now:
+                    self.data.pop(args[1], None)
+                    return None
+                return value
+            if command == b'SET':
+                expires_at = None
+                options = [option.upper() for option in args[3:]]
+                if b'PX' in options:
+                    expires_at = now + int(args[3 + options.index(b'PX') + 1]) / 1000
+                elif b'EX' in options:
+                    expires_at = now + int(args[3 + options.index(b'EX') + 1])
+                self.data[args[1]] = (args[2], expires_at)
+                return 'OK'
+            if command == b'DEL':
+                return sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            if command == b'KEYS':
+                pattern = args[1].decode('utf-8')
+                return [key for key in self.data if fnmatch.fnmatchcase(key.decode('utf-8'), pattern)]
+            if command == b'FLUSHDB':
+                self.data.clear()
+                return 'OK'
+        return RuntimeError(f"ERR unknown command '{command.decode()}'")
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if not line.startswith(b'*'):
+                continue
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self._encode(self.server.execute(args)))
+
+    def _encode(self, reply) -> bytes:
+        if reply is None:
+            return b'$-1\r\n'
+        if isinstance(reply, RuntimeError):
+            return f"-{reply}\r\n".encode()
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        if isinstance(reply, int):
+            return f":{reply}\r\n".encode()
+        if isinstance(reply, list):
+            return f"*{len(reply)}\r\n".encode() + b"".join(self._encode(item) for item in reply)
+        return f"${len(reply)}\r\n".encode() + reply + b"\r\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+
+    server = RespStandInServer(("127.0.0.1", args.port))
+    print(f"Serving on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class ModelRouter:
+    """Pick the model and output length per call type from observed latency.
+
+    Each call type has candidate routes in order of preference. The first
+    candidate whose smoothed latency is within the call type's target (or
+    that has not been observed yet) is chosen; when every candidate is over
+    target, the fastest observed one is used instead. Observations older
+    than probe_interval are ignored, so a slow route is retried eventually.
+    """
+
+    def __init__(self, routes: Dict[str, List[Dict]], latency_targets: Dict[str, float],
+                 smoothing: float = 0.2, probe_interval: float = 300.0):
+        self.routes = routes
+        self.latency_targets = latency_targets
+        self.smoothing = smoothing
+        self.probe_interval = probe_interval
+        self._latency = {}
+        self._observed_at = {}
+        self._calls = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def choose(self, call_type: str) -> Dict:
+        """Return the route ({"model", "max_tokens"}) to use for a call type"""
+        candidates = self.routes[call_type]
+        target = self.latency_targets.get(call_type)
+        now = time.monotonic()
+        with self._lock:
+            observed = [self._latency.get((call_type, route['model'])) for route in candidates]
+            stale = [
+                now - self._observed_at.get((call_type, route['model']), now) > self.probe_interval
+                for route in candidates
+            ]
+        for route, latency, is_stale in zip(candidates, observed, stale):
+            if latency is None or is_stale or target is None or latency <= target:
+                return route
+        return min(zip(candidates, observed), key=lambda item: item[1])[0]
+
+    def record(self, call_type: str, model: str, latency: float, ok: bool = True) -> None:
+        """Fold one call's latency into the model's smoothed latency"""
+        key = (call_type, model)
+        if not ok:
+            # Failed calls count as twice the target so the route backs off
+            latency = max(latency, 2 * self.latency_targets.get(call_type, latency))
+        with self._lock:
+            previous = self._latency.get(key)
+            self._latency[key] = latency if previous is None else (
+                self.smoothing * latency + (1 - self.smoothing) * previous
+            )
+            self._observed_at[key] = time.monotonic()
+            self._calls[key] = self._calls.get(key, 0) + 1
+            if not ok:
+                self._failures[key] = self._failures.get(key, 0) + 1
+
+    def timeout_for(self, call_type: str, factor: float = 2.0) -> Optional[float]:
+        """Request timeout derived from the call type's latency target"""
+        target = self.latency_targets.get(call_type)
+        return None if target is None else target * factor
+
+    def stats(self) -> Dict[str, Dict]:
+        """Smoothed latency, call and failure counts per call type and model"""
+        with self._lock:
+            return {
+                f"{call_type}/{model}": {
+                    'latency': round(latency, 3),
+                    'calls': self._calls.get((call_type, model), 0),
+                    'failures': self._failures.get((call_type, model), 0),
+                }
+                for (call_type, model), latency in self._latency.items()
+            }
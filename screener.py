@@ -0,0 +1,127 @@
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from stock_data import StockDataBatch, METRIC_FIELDS
+
+# Field names and shorthands accepted in filter and sort expressions
+FIELD_ALIASES = {
+    'price': 'current_price',
+    'current_price': 'current_price',
+    'target': 'target_price',
+    'target_price': 'target_price',
+    'pe': 'pe_ratio',
+    'pe_ratio': 'pe_ratio',
+    'change': 'price_change',
+    'price_change': 'price_change',
+    'upside': 'upside',
+    'movers': 'abs_change',
+    'abs_change': 'abs_change',
+}
+
+_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+_CONDITION = re.compile(r'^\s*([a-z_]+)\s*(<=|>=|==|!=|<|>)\s*([+-]?\d+(?:\.\d+)?)\s*%?\s*$', re.IGNORECASE)
+
+
+def parse_filter(expression: str) -> List[Tuple[str, str, float]]:
+    """Parse "pe < 20 and upside > 15" into (field, operator, value) conditions"""
+    conditions = []
+    if not expression or not expression.strip():
+        return conditions
+    for part in re.split(r'\band\b', expression, flags=re.IGNORECASE):
+        match = _CONDITION.match(part)
+        if not match:
+            raise ValueError(f"Cannot parse condition: '{part.strip()}'")
+        name, operator, value = match.groups()
+        field = FIELD_ALIASES.get(name.lower())
+        if field is None:
+            raise ValueError(f"Unknown field '{name}'. Use one of: {', '.join(sorted(FIELD_ALIASES))}")
+        conditions.append((field, operator, float(value)))
+    return conditions
+
+
+class MetricsSnapshot:
+    """Columnar snapshot of the latest cached metrics of every ticker, updated incrementally"""
+
+    def __init__(self, capacity: int = 1024):
+        self.batch = StockDataBatch(capacity=capacity)
+        self.updated_at = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def update(self, ticker: str, stock_data) -> None:
+        """Record the latest metrics for a ticker"""
+        if stock_data is None:
+            return
+        with self._lock:
+            self.batch.upsert(ticker, stock_data)
+            self.updated_at[ticker] = time.time()
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        columns = {name: self.batch.column(name).copy() for name in METRIC_FIELDS}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price = columns['current_price']
+            columns['upside'] = np.where(price > 0, (columns['target_price'] - price) / price * 100, np.nan)
+        columns['abs_change'] = np.abs(columns['price_change'])
+        return columns
+
+    def screen(self, expression: str = "", sort_by: Optional[str] = None,
+               limit: int = 50) -> List[Dict]:
+        """Filter and sort the snapshot without any API calls.
+
+        sort_by takes a field name, optionally prefixed with '-' for descending
+        order (e.g. "-upside"); "movers" sorts by absolute price change.
+        Rows with a missing value in a filtered or sorted field are excluded.
+        """
+        conditions = parse_filter(expression)
+        with self._lock:
+            columns = self._columns()
+            tickers = list(self.batch.tickers)
+
+        mask = np.ones(len(tickers), dtype=bool)
+        for field, operator, value in conditions:
+            # NaN compares False, so missing values never match
+            with np.errstate(invalid='ignore'):
+                mask &= _OPERATORS[operator](columns[field], value)
+        rows = np.flatnonzero(mask)
+
+        if sort_by:
+            descending = sort_by.startswith('-') or sort_by.lower() == 'movers'
+            field = FIELD_ALIASES.get(sort_by.lstrip('-+').lower())
+            if field is None:
+                raise ValueError(f"Unknown sort field '{sort_by}'")
+            keys = columns[field][rows]
+            rows = rows[~np.isnan(keys)]
+            keys = keys[~np.isnan(keys)]
+            if descending:
+                keys = -keys
+            if limit and limit < len(rows):
+                top = np.argpartition(keys, limit - 1)[:limit]
+                rows = rows[top[np.argsort(keys[top], kind='stable')]]
+            else:
+                rows = rows[np.argsort(keys, kind='stable')]
+        elif limit:
+            rows = rows[:limit]
+
+        results = []
+        for row in rows:
+            result = {'ticker': tickers[row]}
+            for name in METRIC_FIELDS + ('upside',):
+                value = float(columns[name][row])
+                result[name] = None if np.isnan(value) else value
+            result['updated_at'] = self.updated_at.get(tickers[row])
+            results.append(result)
+        return results
@@ -0,0 +1,80 @@
+"""Report import-time and rerun-time costs of the Streamlit app.
+
+Usage: python startup_report.py [--reruns N] [--top N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_MODULES = sorted(
+    name[:-3] for name in os.listdir(APP_DIR)
+    if name.endswith('.py') and name != os.path.basename(__file__)
+)
+
+
+def measure_imports(module="app"):
+    """Import a module in a fresh interpreter and return {module: cumulative microseconds}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=APP_DIR, capture_output=True, text=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+def measure_reruns(reruns=10):
+    """Run app.py through Streamlit's test harness and return (first_run, rerun_times) in seconds"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=30)
+    start = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - start
+
+    rerun_times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - start)
+    return first_run, rerun_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = measure_imports()
+    print("Import time (cumulative, ms)")
+    print(f"  {'total (import app)':<30} {timings.get('app', 0) / 1000:>8.1f}")
+    for name in APP_MODULES:
+        if name in timings and name != 'app':
+            print(f"  {name:<30} {timings[name] / 1000:>8.1f}")
+
+    print("\nHeaviest top-level dependencies (ms)")
+    top_level = {
+        name: us for name, us in timings.items()
+        if '.' not in name and name not in APP_MODULES
+    }
+    for name, us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {name:<30} {us / 1000:>8.1f}")
+
+    first_run, rerun_times = measure_reruns(args.reruns)
+    print("\nScript run time (ms)")
+    print(f"  {'first run':<30} {first_run * 1000:>8.1f}")
+    print(f"  {'rerun median':<30} {statistics.median(rerun_times) * 1000:>8.1f}")
+    print(f"  {'rerun max':<30} {max(rerun_times) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
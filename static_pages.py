@@ -0,0 +1,262 @@
+"""Pre-render the latest cached report and metrics of the most requested tickers to static HTML and JSON.
+
+Pages are regenerated only when a ticker's cache entries change, so the
+command is cheap to run from cron (or with --every). The output directory
+defaults to public/reports, which the Next.js app serves as-is.
+Usage: python static_pages.py [--top N] [--tickers AAPL TCS] [--every SECONDS]
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import time
+from html import escape, unescape
+from typing import Dict, Iterable, List, Optional
+
+from cache_backends import encode_value
+from stock_data import StockData
+
+_INLINE_RULES = (
+    (re.compile(r'`([^`]+)`'), r'<code>\1</code>'),
+    (re.compile(r'\*\*(.+?)\*\*|__(.+?)__'), lambda m: f"<strong>{m.group(1) or m.group(2)}</strong>"),
+    (re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])'), r'<em>\1</em>'),
+    (re.compile(r'\[([^\]]+)\]\((https?://[^\s)]+)\)'), lambda m: _link(m.group(1), m.group(2), m.group(0))),
+)
+_HEADING = re.compile(r'^(#{1,6})\s+(.*?)\s*#*$')
+_LIST_ITEM = re.compile(r'^\s*(?:([-*+])|(\d+)[.)])\s+(.*)$')
+_RULE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+
+
+def _link(label: str, url: str, original: str) -> str:
+    """Anchor for an escaped markdown link; URLs that could leave the attribute stay plain text"""
+    url = unescape(url)
+    if re.search(r'[\s"\'<>`]', url):
+        return original
+    return f'<a href="{escape(url)}" rel="nofollow noopener">{label}</a>'
+
+
+def _inline(text: str) -> str:
+    text = escape(text)
+    for pattern, replacement in _INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _cells(row: str) -> List[str]:
+    return [cell.strip() for cell in row.strip().strip('|').split('|')]
+
+
+def markdown_to_html(text: str) -> str:
+    """Convert the markdown subset reports use (headings, lists, tables, emphasis, links) to HTML.
+
+    Raw HTML in the input is escaped rather than passed through, since
+    reports are model output served from our own origin.
+    """
+    lines = text.strip().splitlines()
+    html = []
+    paragraph = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            html.append(f"<p>{'<br>'.join(_inline(line) for line in paragraph)}</p>")
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            html.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+            i += 1
+            continue
+
+        if _RULE.match(line) and not paragraph:
+            html.append("<hr>")
+            i += 1
+            continue
+
+        if line.lstrip().startswith('|') and i + 1 < len(lines) and _TABLE_SEPARATOR.match(lines[i + 1]):
+            flush_paragraph()
+            header = ''.join(f"<th>{_inline(cell)}</th>" for cell in _cells(line))
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].lstrip().startswith('|'):
+                rows.append('<tr>' + ''.join(f"<td>{_inline(cell)}</td>" for cell in _cells(lines[i])) + '</tr>')
+                i += 1
+            html.append(f"<table><thead><tr>{header}</tr></thead><tbody>{''.join(rows)}</tbody></table>")
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item:
+            flush_paragraph()
+            tag = 'ul' if item.group(1) else 'ol'
+            items = []
+            while i < len(lines):
+                item = _LIST_ITEM.match(lines[i])
+                if item and ('ul' if item.group(1) else 'ol') != tag:
+                    break
+                if item:
+                    items.append(_inline(item.group(3)))
+                elif lines[i].strip() and lines[i].startswith((' ', '\t')) and items:
+                    # Continuation of the previous item
+                    items[-1] += ' ' + _inline(lines[i].strip())
+                else:
+                    break
+                i += 1
+            html.append(f"<{tag}>{''.join(f'<li>{entry}</li>' for entry in items)}</{tag}>")
+            continue
+
+        paragraph.append(line.strip())
+        i += 1
+
+    flush_paragraph()
+    return ''.join(html)
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        handle.write(content)
+    os.replace(tmp_path, path)
+
+
+class StaticPageGenerator:
+    """Render cached reports to {ticker}.html and {ticker}.json, plus an index.json listing them.
+
+    A manifest records a fingerprint of the report each page was built
+    from; a ticker whose report is unchanged is left alone, and pages of
+    tickers that drop out of the selection are removed. Metrics expire
+    within minutes, so they do not count as a change; the manifest keeps
+    the last good metrics for pages rendered while none are cached.
+    """
+
+    def __init__(self, analyzer, output_dir: str):
+        self.analyzer = analyzer
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, 'manifest.json')
+        try:
+            with open(self.manifest_path, encoding='utf-8') as handle:
+                self.manifest = json.load(handle)
+        except (OSError, ValueError):
+            self.manifest = {}
+
+    def _path(self, ticker: str, extension: str) -> str:
+        return os.path.join(self.output_dir, f"{ticker}.{extension}")
+
+    def _render(self, ticker: str, fetched_at: float, report: str, stock_data) -> None:
+        from ui_components import static_report_page  # Only needed when something changed
+
+        updated = datetime.datetime.fromtimestamp(fetched_at, datetime.timezone.utc)
+        page = static_report_page(ticker, stock_data, markdown_to_html(report),
+                                  updated.strftime('%Y-%m-%d %H:%M UTC'))
+        _write_atomic(self._path(ticker, 'html'), page)
+        _write_atomic(self._path(ticker, 'json'), json.dumps({
+            'ticker': ticker,
+            'fetched_at': fetched_at,
+            'metrics': stock_data.to_dict() if stock_data is not None else None,
+            'report': report,
+        }, ensure_ascii=False))
+
+    def generate(self, tickers: Iterable[str]) -> Dict[str, List[str]]:
+        """Bring the pages of the given canonical tickers up to date; returns tickers by outcome"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        outcome = {'written': [], 'unchanged': [], 'missing': [], 'removed': []}
+        selected = []
+        for ticker in tickers:
+            cached = self.analyzer.cached_report(ticker)
+            if not cached:
+                # Nothing to render yet; a page from an earlier report is kept
+                outcome['missing'].append(ticker)
+                if ticker in self.manifest:
+                    selected.append(ticker)
+                continue
+            selected.append(ticker)
+            fetched_at, report = cached
+            stock_data = (self.analyzer.cache.get(f"stock_data_{ticker}") or (None, []))[0]
+            if stock_data is not None and not stock_data.has_price:
+                stock_data = None
+            fingerprint = hashlib.sha1(encode_value((fetched_at, report))).hexdigest()
+            entry = self.manifest.get(ticker) or {}
+            # A page rendered without metrics is redone once some are cached
+            if (entry.get('fingerprint') == fingerprint and (entry.get('metrics') or stock_data is None)
+                    and os.path.exists(self._path(ticker, 'html'))):
+                outcome['unchanged'].append(ticker)
+                continue
+            if stock_data is None and entry.get('metrics'):
+                stock_data = StockData.from_dict(entry['metrics'])
+            self._render(ticker, fetched_at, report, stock_data)
+            self.manifest[ticker] = {
+                'fingerprint': fingerprint,
+                'fetched_at': fetched_at,
+                'generated_at': time.time(),
+                'metrics': stock_data.to_dict() if stock_data is not None else None,
+            }
+            outcome['written'].append(ticker)
+
+        for ticker in [ticker for ticker in self.manifest if ticker not in selected]:
+            for extension in ('html', 'json'):
+                try:
+                    os.remove(self._path(ticker, extension))
+                except OSError:
+                    pass
+            del self.manifest[ticker]
+            outcome['removed'].append(ticker)
+
+        if outcome['written'] or outcome['removed'] or not os.path.exists(self.manifest_path):
+            _write_atomic(os.path.join(self.output_dir, 'index.json'), json.dumps([
+                {'ticker': ticker, 'fetched_at': self.manifest[ticker]['fetched_at'],
+                 'html': f"{ticker}.html", 'json': f"{ticker}.json"}
+                for ticker in selected
+            ]))
+            _write_atomic(self.manifest_path, json.dumps(self.manifest))
+        return outcome
+
+
+def top_tickers(analyzer, n: int) -> List[str]:
+    """The n most requested canonical tickers, from the app's request counts"""
+    return [ticker for ticker, _ in analyzer.popularity.top(n)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from analyzer import StockSentimentAnalyzer
+    from config import get_config
+    from instruments import resolve_ticker
+
+    config = get_config()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=config.static_pages_top, help="Number of most requested tickers")
+    parser.add_argument("--tickers", nargs="+", help="Render these tickers instead of the most requested")
+    parser.add_argument("--output", default=config.static_pages_dir)
+    parser.add_argument("--every", type=float, help="Keep running, checking for changes every this many seconds")
+    args = parser.parse_args()
+
+    analyzer = StockSentimentAnalyzer(config.perplexity_api_key)
+    if not analyzer.cache.shared:
+        parser.error("CACHE_BACKEND=memory holds nothing outside the app process; use file or redis")
+    generator = StaticPageGenerator(analyzer, args.output)
+    explicit: Optional[List[str]] = None
+    if args.tickers:
+        explicit = [result for is_valid, result in map(resolve_ticker, args.tickers) if is_valid]
+
+    while True:
+        outcome = generator.generate(explicit or top_tickers(analyzer, args.top))
+        print(f"{datetime.datetime.now():%H:%M:%S} " + ", ".join(
+            f"{name} {len(tickers)}" for name, tickers in outcome.items()
+        ))
+        if not args.every:
+            break
+        try:
+            time.sleep(args.every)
+        except KeyboardInterrupt:
+            break
@@ -0,0 +1,168 @@
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Numeric metric fields shared by the record and the batch container
+METRIC_FIELDS = ('current_price', 'target_price', 'pe_ratio', 'price_change')
+
+
+def is_missing(value) -> bool:
+    """True for None and NaN, the two missing-value markers used for metrics"""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class StockData:
+    """Metrics for a single ticker; None marks a value that could not be fetched"""
+
+    __slots__ = METRIC_FIELDS + ('is_indian',)
+
+    def __init__(self, current_price: Optional[float] = None, target_price: Optional[float] = None,
+                 pe_ratio: Optional[float] = None, price_change: Optional[float] = None,
+                 is_indian: bool = False):
+        self.current_price = current_price
+        self.target_price = target_price
+        self.pe_ratio = pe_ratio
+        self.price_change = price_change
+        self.is_indian = is_indian
+
+    # Mapping-style access keeps code written against the old dict shape working
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default=None):
+        """Return a field value, or default for unknown or missing fields"""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if is_missing(value) else value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StockData):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"StockData({fields})"
+
+    @property
+    def has_price(self) -> bool:
+        """Whether a usable current price was fetched"""
+        return not is_missing(self.current_price) and self.current_price > 0
+
+    @property
+    def upside(self) -> Optional[float]:
+        """Percentage upside from the current price to the target price"""
+        if not self.has_price or is_missing(self.target_price):
+            return None
+        return (self.target_price - self.current_price) / self.current_price * 100
+
+    def to_dict(self) -> Dict:
+        """Convert to the legacy dict shape, where 0 marks a missing metric"""
+        data = {name: (0 if is_missing(getattr(self, name)) else getattr(self, name)) for name in METRIC_FIELDS}
+        data['is_indian'] = self.is_indian
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StockData':
+        """Build a record from a legacy dict, treating 0 prices and PE ratios as missing"""
+        def price(name):
+            value = data.get(name)
+            return None if is_missing(value) or value == 0 else float(value)
+
+        change = data.get('price_change')
+        return cls(
+            current_price=price('current_price'),
+            target_price=price('target_price'),
+            pe_ratio=price('pe_ratio'),
+            price_change=None if is_missing(change) else float(change),
+            is_indian=bool(data.get('is_indian', False)),
+        )
+
+
+class StockDataBatch:
+    """Struct-of-arrays container for the metrics of many tickers; NaN marks missing values"""
+
+    def __init__(self, capacity: int = 1024):
+        self.tickers = []
+        self._rows = {}
+        self._size = 0
+        self._columns = {name: np.full(capacity, np.nan) for name in METRIC_FIELDS}
+        self._is_indian = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._rows
+
+    def _grow(self) -> None:
+        capacity = max(1, len(self._is_indian)) * 2
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+        is_indian = np.zeros(capacity, dtype=bool)
+        is_indian[:self._size] = self._is_indian[:self._size]
+        self._is_indian = is_indian
+
+    def upsert(self, ticker: str, record) -> int:
+        """Insert or overwrite the row for a ticker from a StockData or legacy dict; returns its row"""
+        if isinstance(record, dict):
+            record = StockData.from_dict(record)
+        row = self._rows.get(ticker)
+        if row is None:
+            if self._size == len(self._is_indian):
+                self._grow()
+            row = self._size
+            self._rows[ticker] = row
+            self.tickers.append(ticker)
+            self._size += 1
+        for name in METRIC_FIELDS:
+            value = getattr(record, name)
+            self._columns[name][row] = np.nan if is_missing(value) else value
+        self._is_indian[row] = record.is_indian
+        return row
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, object]]) -> 'StockDataBatch':
+        """Build a batch from (ticker, StockData or legacy dict) pairs"""
+        records = list(records)
+        batch = cls(capacity=max(len(records), 1))
+        for ticker, record in records:
+            batch.upsert(ticker, record)
+        return batch
+
+    def column(self, name: str) -> np.ndarray:
+        """Return a read-only view of one metric column (or 'is_indian')"""
+        source = self._is_indian if name == 'is_indian' else self._columns[name]
+        view = source[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def record(self, ticker: str) -> StockData:
+        """Return the row for a ticker as a StockData record"""
+        row = self._rows[ticker]
+        values = {name: float(self._columns[name][row]) for name in METRIC_FIELDS}
+        return StockData(
+            **{name: (None if math.isnan(value) else value) for name, value in values.items()},
+            is_indian=bool(self._is_indian[row]),
+        )
+
+    def to_dicts(self) -> Dict[str, Dict]:
+        """Convert every row to the legacy dict shape the UI uses, keyed by ticker"""
+        return {ticker: self.record(ticker).to_dict() for ticker in self.tickers}
+
+    def to_dataframe(self):
+        """Return a pandas DataFrame indexed by ticker (pandas is imported on demand)"""
+        import pandas as pd
+
+        data = {name: self.column(name).copy() for name in METRIC_FIELDS}
+        data['is_indian'] = self.column('is_indian').copy()
+        return pd.DataFrame(data, index=pd.Index(list(self.tickers), name='ticker'))
@@ -0,0 +1,192 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+# Allowed values of the enumerated fields
+RATINGS = ('BUY', 'SELL', 'HOLD')
+SENTIMENTS = ('Bullish', 'Bearish', 'Neutral')
+LEVELS = ('High', 'Medium', 'Low')
+
+# Broker-style ratings the model sometimes uses instead of BUY/SELL/HOLD
+RATING_ALIASES = {
+    'strong buy': 'BUY', 'outperform': 'BUY', 'overweight': 'BUY', 'accumulate': 'BUY',
+    'strong sell': 'SELL', 'underperform': 'SELL', 'underweight': 'SELL', 'reduce': 'SELL',
+    'neutral': 'HOLD', 'market perform': 'HOLD', 'equal weight': 'HOLD', 'equal-weight': 'HOLD',
+}
+
+# Price levels, numeric in the JSON reply
+PRICE_FIELDS = ('entry_low', 'entry_high', 'stop_loss', 'target_price', 'support', 'resistance')
+
+
+def _text(value) -> Optional[str]:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _number(value) -> Optional[float]:
+    """A price from a number or a string such as "₹1,234.50"; None when absent or unparseable"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if value == value and value > 0 else None
+    match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value or ''))
+    return float(match.group().replace(',', '')) if match else None
+
+
+def _choice(value, choices) -> Optional[str]:
+    text = (_text(value) or '').lower()
+    return next((choice for choice in choices if choice.lower() == text or text.startswith(choice.lower())), None)
+
+
+def _rating(value) -> Optional[str]:
+    return _choice(value, RATINGS) or RATING_ALIASES.get((_text(value) or '').lower())
+
+
+def _texts(value, limit: int = 5) -> List[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+    return [text for text in map(_text, value) if text][:limit]
+
+
+def _section(value) -> Dict:
+    """A nested object of the reply; anything else the model put there counts as missing"""
+    return value if isinstance(value, dict) else {}
+
+
+class StructuredReport:
+    """Typed fields of a report returned as JSON (REPORT_FORMAT=json); None marks a missing field"""
+
+    __slots__ = ('sentiment', 'investor_confidence', 'key_insight', 'earnings', 'announcements',
+                 'industry_trends', 'price_trend', 'volume', 'market_risks', 'company_risks',
+                 'industry_risks', 'rating', 'confidence', 'timeframe', 'theses', 'citations') + PRICE_FIELDS
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        self.theses = self.theses or []
+        self.citations = self.citations or []
+
+    def __repr__(self) -> str:
+        return f"StructuredReport(rating={self.rating!r}, target_price={self.target_price!r})"
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'StructuredReport':
+        """Build a report from the model's JSON object, coercing and validating every field"""
+        developments = _section(data.get('developments'))
+        technicals = _section(data.get('technicals'))
+        risks = _section(data.get('risks'))
+        return cls(
+            sentiment=_choice(data.get('sentiment'), SENTIMENTS),
+            investor_confidence=_choice(data.get('investor_confidence'), LEVELS),
+            key_insight=_text(data.get('key_insight')),
+            earnings=_text(developments.get('earnings')),
+            announcements=_text(developments.get('announcements')),
+            industry_trends=_text(developments.get('industry')),
+            price_trend=_text(technicals.get('trend')),
+            support=_number(technicals.get('support')),
+            resistance=_number(technicals.get('resistance')),
+            volume=_text(technicals.get('volume')),
+            market_risks=_text(risks.get('market')),
+            company_risks=_text(risks.get('company')),
+            industry_risks=_text(risks.get('industry')),
+            rating=_rating(data.get('rating')),
+            confidence=_choice(data.get('confidence'), LEVELS),
+            entry_low=_number(data.get('entry_low')),
+            entry_high=_number(data.get('entry_high')),
+            stop_loss=_number(data.get('stop_loss')),
+            target_price=_number(data.get('target_price')),
+            timeframe=_text(data.get('timeframe')),
+            theses=_texts(data.get('theses')),
+            citations=[url for url in _texts(data.get('citations'), limit=10) if url.startswith(('http://', 'https://'))],
+        )
+
+    def to_dict(self) -> Dict:
+        """Flat dict of every field, as cached under report_fields_{ticker}"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def parse_report(text: str) -> StructuredReport:
+    """Parse the model's JSON reply, tolerating code fences or prose around the object.
+
+    Raises ValueError when there is no JSON object or it lacks a rating,
+    which makes the rest of the report untrustworthy as well.
+    """
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in the report")
+    data = json.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Report is not a JSON object")
+    try:
+        report = StructuredReport.from_dict(data)
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed report: {e}") from e
+    if report.rating is None:
+        raise ValueError("Report has no valid rating")
+    return report
+
+
+def render_markdown(report: StructuredReport, currency: str = "$", with_technicals: bool = True) -> str:
+    """Render the report locally in the section layout of the full prompt profile"""
+    def price(value):
+        return f"**{currency}{value:,.2f}**" if value is not None else "N/A"
+
+    def lines(*pairs, bullet=False):
+        # Label/value pairs with a value; a trailing double space keeps unbulleted lines apart
+        shown = [f"**{label}:** {value}" for label, value in pairs if value]
+        return "\n".join(f"- {line}" for line in shown) if bullet else "  \n".join(shown)
+
+    sections = [
+        "## 📊 Market Sentiment Analysis\n" + lines(
+            ("Sentiment", report.sentiment and f"**{report.sentiment}**"),
+            ("Investor Confidence", report.investor_confidence),
+            ("Key Insight", report.key_insight),
+        ),
+        "## 📈 Recent Developments\n" + lines(
+            ("Earnings & Financial Results", report.earnings),
+            ("Major Announcements", report.announcements),
+            ("Industry Trends", report.industry_trends),
+            bullet=True,
+        ),
+    ]
+    if with_technicals:
+        levels = None
+        if report.support is not None or report.resistance is not None:
+            levels = f"{price(report.support)} / {price(report.resistance)}"
+        sections.append("## 🔍 Technical Analysis\n" + lines(
+            ("Price Trend", report.price_trend),
+            ("Support/Resistance", levels),
+            ("Volume Analysis", report.volume),
+            bullet=True,
+        ))
+    entry = None
+    if report.entry_low is not None and report.entry_high is not None:
+        entry = f"{price(report.entry_low)} – {price(report.entry_high)}"
+    elif report.entry_low is not None or report.entry_high is not None:
+        entry = price(report.entry_low if report.entry_low is not None else report.entry_high)
+    sections += [
+        "## ⚠️ Risk Assessment\n" + lines(
+            ("Market Risks", report.market_risks),
+            ("Company Risks", report.company_risks),
+            ("Industry Risks", report.industry_risks),
+        ),
+        "## 🎯 Investment Recommendation\n" + lines(
+            ("🏷️ Rating", f"**{report.rating}**"),
+            ("📊 Confidence", report.confidence),
+            ("💰 Entry Range", entry),
+            ("🛑 Stop Loss", report.stop_loss is not None and price(report.stop_loss)),
+            ("🎯 Target Price", report.target_price is not None and price(report.target_price)),
+            ("⏰ Timeframe", report.timeframe),
+        ),
+    ]
+    if report.theses:
+        sections.append("## 💡 Key Investment Thesis\n" + "\n".join(
+            f"{number}. {thesis}" for number, thesis in enumerate(report.theses, 1)
+        ))
+    if report.citations:
+        sections.append("**Sources:** " + " ".join(
+            f"[{number}]({url})" for number, url in enumerate(report.citations, 1)
+        ))
+    return "\n\n".join(sections) + "\n"
@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+from deadline import Deadline
+
+
+class _SharedTask:
+    __slots__ = ('future', 'deadline', 'waiters')
+
+    def __init__(self, deadline: Deadline):
+        self.future = None
+        self.deadline = deadline
+        self.waiters = set()
+
+
+class TaskHandle:
+    """One waiter's claim on a shared task; release it once the result is no longer needed"""
+
+    def __init__(self, tasks: 'SharedTasks', key: Hashable, task: _SharedTask):
+        self._tasks = tasks
+        self.key = key
+        self._task = task
+        self.released = False
+
+    def result(self, timeout=None):
+        return self._task.future.result(timeout)
+
+    def done(self) -> bool:
+        return self._task.future.done()
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._tasks._release(self)
+
+
+class SharedTasks:
+    """Run each keyed piece of work once for all of its concurrent waiters, and cancel it when none remain.
+
+    start() returns a handle per waiter. Work that is already running under
+    the same key is joined instead of started again; when the last waiter
+    releases its handle before the work is done, the task's deadline is
+    cancelled, which aborts its upstream calls.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        # Re-entrant: a future that is already done runs its done callback inside start()
+        self._lock = threading.RLock()
+
+    def start(self, key: Hashable, submit: Callable[[Deadline], Future], seconds: float) -> TaskHandle:
+        """Join the running task for key, or start one: submit(deadline) schedules it and returns its Future"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = _SharedTask(Deadline(seconds))
+                task.future = submit(task.deadline)
+                self._tasks[key] = task
+                task.future.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+            handle = TaskHandle(self, key, task)
+            task.waiters.add(handle)
+            return handle
+
+    def _forget(self, key: Hashable, task: _SharedTask) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def _release(self, handle: TaskHandle) -> None:
+        task = handle._task
+        with self._lock:
+            task.waiters.discard(handle)
+            if task.waiters or task.future.done():
+                return
+            # Nobody needs the result any more
+            if self._tasks.get(handle.key) is task:
+                del self._tasks[handle.key]
+        task.future.cancel()
+        task.deadline.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of running tasks and of waiters across them"""
+        with self._lock:
+            return {
+                'running': len(self._tasks),
+                'waiters': sum(len(task.waiters) for task in self._tasks.values()),
+            }
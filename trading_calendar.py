@@ -0,0 +1,80 @@
+import csv
+import datetime
+import logging
+import os
+from typing import Dict, Optional, Set
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+# Regular sessions per exchange: (timezone, open, close)
+SESSIONS = {
+    'NSE': (ZoneInfo("Asia/Kolkata"), datetime.time(9, 15), datetime.time(15, 30)),
+    'NYSE': (ZoneInfo("America/New_York"), datetime.time(9, 30), datetime.time(16, 0)),
+}
+
+
+def exchange_for(is_indian: bool) -> str:
+    """Exchange whose calendar applies to an instrument, as decided by _is_indian_stock"""
+    return 'NSE' if is_indian else 'NYSE'
+
+
+def _utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class TradingCalendar:
+    """Trading sessions, weekends and holidays for the exchanges the app covers"""
+
+    def __init__(self, holidays: Optional[Dict[str, Set[datetime.date]]] = None):
+        self.holidays = {exchange: set() for exchange in SESSIONS}
+        for exchange, days in (holidays or {}).items():
+            self.holidays.setdefault(exchange, set()).update(days)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'TradingCalendar':
+        """Load holidays from a CSV with exchange,date[,description] rows; a missing file means no holidays"""
+        holidays = {}
+        if not os.path.exists(path):
+            logger.warning("Holiday file %s not found; only weekends are treated as closed", os.path.abspath(path))
+        else:
+            with open(path, newline='', encoding='utf-8') as handle:
+                for row in csv.DictReader(line for line in handle if not line.startswith('#')):
+                    day = datetime.date.fromisoformat(row['date'].strip())
+                    holidays.setdefault(row['exchange'].strip().upper(), set()).add(day)
+        return cls(holidays)
+
+    def is_trading_day(self, exchange: str, day: datetime.date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays.get(exchange, ())
+
+    def is_open(self, exchange: str, now: Optional[datetime.datetime] = None) -> bool:
+        """Whether the exchange's regular session is open at `now` (UTC-aware, default current time)"""
+        tz, open_time, close_time = SESSIONS[exchange]
+        local = (now or _utc_now()).astimezone(tz)
+        return self.is_trading_day(exchange, local.date()) and open_time <= local.time() < close_time
+
+    def next_open(self, exchange: str, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """Start of the next session strictly after `now`, or of the current one if it has not opened yet"""
+        tz, open_time, _ = SESSIONS[exchange]
+        local = (now or _utc_now()).astimezone(tz)
+        day = local.date()
+        if local.time() >= open_time:
+            day += datetime.timedelta(days=1)
+        while not self.is_trading_day(exchange, day):
+            day += datetime.timedelta(days=1)
+        return datetime.datetime.combine(day, open_time, tzinfo=tz)
+
+    def seconds_until_open(self, exchange: str, now: Optional[datetime.datetime] = None) -> float:
+        now = now or _utc_now()
+        return (self.next_open(exchange, now) - now).total_seconds()
+
+    def cache_ttl(self, exchange: str, live_ttl: float, now: Optional[datetime.datetime] = None) -> float:
+        """Lifetime of a market-data cache entry fetched at `now`.
+
+        During a live session entries expire after live_ttl; while the market
+        is closed they live until the next session opens.
+        """
+        now = now or _utc_now()
+        if self.is_open(exchange, now):
+            return live_ttl
+        return max(live_ttl, self.seconds_until_open(exchange, now))
@@ -1,376 +1,532 @@
+from html import escape as html_escape
+import re
+from functools import lru_cache
 import streamlit as st
 from utils import DataProcessor
+from stock_data import StockData, is_missing
+
+
+def _minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def _compact_html(html):
+    """Drop the indentation between tags of an HTML fragment"""
+    return re.sub(r'>\s+<', '><', html.strip())
+
+
+# Static stylesheet, minified once per process. The analysis overrides that
+# render_analysis used to inject on every call are appended at the end so the
+# cascade is unchanged.
+_CUSTOM_CSS = """
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+
+    .stApp {
+        background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%);
+        color: #ffffff;
+        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+        overflow-x: hidden;
+    }
+
+    /* Hide Streamlit elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    .stDeployButton {display: none;}
+
+    /* Custom scrollbar */
+    ::-webkit-scrollbar {
+        width: 6px;
+    }
+
+    ::-webkit-scrollbar-track {
+        background: transparent;
+    }
+
+    ::-webkit-scrollbar-thumb {
+        background: rgba(255, 255, 255, 0.2);
+        border-radius: 3px;
+    }
+
+    ::-webkit-scrollbar-thumb:hover {
+        background: rgba(255, 255, 255, 0.3);
+    }
+
+    /* Center everything on the page */
+    .block-container {
+        padding-top: 1rem !important;
+        padding-bottom: 2rem !important;
+        max-width: 100% !important;
+        display: flex !important;
+        flex-direction: column !important;
+        align-items: center !important;
+        justify-content: flex-start !important;
+        min-height: 100vh !important;
+    }
+
+    /* Main container */
+    .main-container {
+        width: 100%;
+        max-width: 800px;
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: center;
+        margin: 0 auto;
+        padding: 0 2rem;
+    }
+
+    /* Title styling - minimal and elegant */
+    .app-title {
+        font-size: 4rem;
+        font-weight: 200;
+        color: #ffffff;
+        text-align: center;
+        margin-bottom: 0.5rem;
+        letter-spacing: -0.03em;
+        font-family: 'Inter', sans-serif;
+        width: 100%;
+        background: linear-gradient(135deg, #ffffff 0%, #cccccc 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        background-clip: text;
+    }
+
+    .app-subtitle {
+        font-size: 1rem;
+        font-weight: 400;
+        color: #666666;
+        text-align: center;
+        margin-bottom: 3rem;
+        font-family: 'Inter', sans-serif;
+        width: 100%;
+    }
+
+    /* Search container - smaller and more compact */
+    .search-wrapper {
+        width: 100%;
+        max-width: 500px;
+        position: relative;
+        margin-bottom: 2rem;
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+    }
+
+    /* Input styling - clean and minimal */
+    .stTextInput {
+        width: 100% !important;
+    }
+
+    .stTextInput > div {
+        width: 100% !important;
+    }
+
+    .stTextInput > div > div {
+        width: 100% !important;
+    }
+
+    .stTextInput > div > div > input {
+        background: linear-gradient(135deg, #141414 0%, #1a1a1a 100%) !important;
+        border: 1px solid #2a2a2a !important;
+        border-radius: 12px !important;
+        padding: 1rem 1.5rem !important;
+        font-size: 1rem !important;
+        color: #ffffff !important;
+        height: 48px !important;
+        font-family: 'Inter', sans-serif !important;
+        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
+        box-shadow: 0 2px 10px rgba(0, 0, 0, 0.3) !important;
+        width: 100% !important;
+        text-align: center !important;
+        font-weight: 400 !important;
+        backdrop-filter: blur(10px) !important;
+        text-indent: 0 !important;
+        box-sizing: border-box !important;
+    }
+
+    .stTextInput > div > div > input::placeholder {
+        color: #6a6a6a !important;
+        font-family: 'Inter', sans-serif !important;
+        text-align: center !important;
+        font-weight: 400 !important;
+        padding-left: 0 !important;
+    }
+
+    .stTextInput > div > div > input:focus {
+        border-color: #505050 !important;
+        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.5), 0 0 0 2px rgba(80, 80, 80, 0.3) !important;
+        outline: none !important;
+        text-align: center !important;
+        background: linear-gradient(135deg, #161616 0%, #1e1e1e 100%) !important;
+        transform: translateY(-2px) !important;
+    }
+
+    /* Button styling - centered and minimal */
+    .stButton {
+        width: 100% !important;
+        display: flex !important;
+        justify-content: center !important;
+    }
+
+    .stButton > button {
+        background: linear-gradient(135deg, #1a1a1a 0%, #252525 100%) !important;
+        color: #ffffff !important;
+        border: 1px solid #333333 !important;
+        border-radius: 12px !important;
+        padding: 0.9rem 2rem !important;
+        font-size: 1rem !important;
+        font-weight: 500 !important;
+        font-family: 'Inter', sans-serif !important;
+        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
+        height: 48px !important;
+        margin-top: 1.5rem !important;
+        min-width: 140px !important;
+        box-shadow: 0 4px 16px rgba(0, 0, 0, 0.3) !important;
+        backdrop-filter: blur(10px) !important;
+    }
+
+    .stButton > button:hover {
+        background: linear-gradient(135deg, #252525 0%, #303030 100%) !important;
+        border-color: #505050 !important;
+        transform: translateY(-2px) !important;
+        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.4) !important;
+    }
+
+    /* Results container - centered */
+    .results-container {
+        width: 100%;
+        max-width: 800px;
+        margin: 2rem auto 0 auto;
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+    }
+
+    /* Metrics styling - centered */
+    .metrics-row {
+        display: flex;
+        gap: 1rem;
+        margin: 2rem 0;
+        flex-wrap: wrap;
+        justify-content: center;
+        width: 100%;
+        max-width: 800px;
+    }
+
+    .metric-item {
+        background-color: #141414;
+        border: 1px solid #2a2a2a;
+        border-radius: 12px;
+        padding: 1.2rem;
+        flex: 1;
+        min-width: 160px;
+        text-align: center;
+        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
+        transition: all 0.3s ease;
+    }
+
+    .metric-item:hover {
+        border-color: #404040;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
+    }
+
+    .metric-label {
+        color: #999999;
+        font-size: 0.875rem;
+        margin-bottom: 0.6rem;
+        font-weight: 500;
+    }
+
+    .metric-value {
+        color: #ffffff;
+        font-size: 1.3rem;
+        font-weight: 600;
+    }
+
+    /* Analysis container - beautiful and structured */
+    .analysis-content {
+        background: linear-gradient(135deg, #141414 0%, #1a1a1a 100%);
+        border: 1px solid #2a2a2a;
+        border-radius: 16px;
+        padding: 3rem;
+        margin: 2rem auto;
+        line-height: 1.8;
+        width: 100%;
+        max-width: 900px;
+        text-align: left;
+        box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
+        backdrop-filter: blur(10px);
+        overflow-y: visible;
+        max-height: none;
+    }
+
+    .analysis-content h2 {
+        color: #ffffff;
+        margin-top: 2.5rem;
+        margin-bottom: 1.2rem;
+        font-weight: 600;
+        font-size: 1.4rem;
+        border-bottom: 2px solid #333333;
+        padding-bottom: 0.5rem;
+    }
+
+    .analysis-content h2:first-child {
+        margin-top: 0;
+    }
+
+    .analysis-content h3 {
+        color: #ffffff;
+        margin-top: 1.8rem;
+        margin-bottom: 0.8rem;
+        font-weight: 600;
+        font-size: 1.1rem;
+    }
+
+    .analysis-content p, .analysis-content li {
+        color: #cccccc;
+        margin-bottom: 0.8rem;
+        font-size: 1rem;
+    }
+
+    .analysis-content strong {
+        color: #ffffff;
+        font-weight: 600;
+    }
+
+    .analysis-content ul, .analysis-content ol {
+        margin-left: 1.5rem;
+        margin-bottom: 1rem;
+    }
+
+    .analysis-content li {
+        margin-bottom: 0.5rem;
+        padding-left: 0.5rem;
+    }
+
+    /* Messages - centered */
+    .info-message {
+        background-color: #141414;
+        border: 1px solid #2a2a2a;
+        border-radius: 12px;
+        padding: 1.2rem;
+        color: #cccccc;
+        text-align: center;
+        margin: 1rem auto;
+        width: 100%;
+        max-width: 600px;
+        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
+    }
+
+    .error-message {
+        background-color: #1a0f0f;
+        border: 1px solid #3a1a1a;
+        border-radius: 12px;
+        padding: 1.2rem;
+        color: #ff9999;
+        margin: 1rem auto;
+        width: 100%;
+        max-width: 600px;
+        text-align: center;
+        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
+    }
+
+    /* Loading spinner */
+    .stSpinner > div {
+        border-color: #4a5568 transparent transparent transparent !important;
+    }
+
+    /* Hide labels */
+    .stTextInput > label {
+        display: none !important;
+    }
+
+    /* Ensure columns are centered */
+    .stColumns {
+        width: 100% !important;
+        display: flex !important;
+        justify-content: center !important;
+    }
+
+    /* Center the entire app content */
+    .main .block-container {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        justify-content: flex-start;
+        min-height: 100vh;
+        padding-top: 2rem;
+    }
+
+    /* Fix scrolling */
+    .main {
+        overflow-y: auto !important;
+        height: auto !important;
+    }
+
+    /* Analysis report overrides */
+    .analysis-content {
+        color: #cccccc !important;
+        line-height: 1.8 !important;
+        max-width: 900px !important;
+        margin: 0 auto !important;
+        padding: 2rem 1rem !important;
+        word-wrap: break-word !important;
+        overflow-wrap: break-word !important;
+    }
+    .analysis-content h2 {
+        color: #ffffff !important;
+        margin-top: 3rem !important;
+        margin-bottom: 1.5rem !important;
+        font-weight: 600 !important;
+        font-size: 1.5rem !important;
+        border-bottom: 2px solid #333333 !important;
+        padding-bottom: 0.8rem !important;
+    }
+    .analysis-content h2:first-child {
+        margin-top: 1rem !important;
+    }
+    .analysis-content p, .analysis-content li {
+        color: #cccccc !important;
+        margin-bottom: 1rem !important;
+        font-size: 1rem !important;
+        line-height: 1.8 !important;
+        word-wrap: break-word !important;
+        overflow-wrap: break-word !important;
+        hyphens: auto !important;
+    }
+    .analysis-content strong {
+        color: #ffffff !important;
+        font-weight: 600 !important;
+    }
+    .analysis-content ul, .analysis-content ol {
+        margin-left: 2rem !important;
+        margin-bottom: 1.5rem !important;
+    }
+    .analysis-content li {
+        margin-bottom: 0.8rem !important;
+    }
+"""
+_STYLE_TAG = f"<style>{_minify_css(_CUSTOM_CSS)}</style>"
+
+_HEADER_HTML = _compact_html("""
+<div style="width: 100%; display: flex; flex-direction: column; align-items: center; margin-bottom: 2rem;">
+    <h1 class="app-title">tradeo</h1>
+    <p class="app-subtitle">intelligent stock analysis, simplified</p>
+</div>
+""")
+
+_SUGGESTIONS_HTML = _compact_html("""
+<div style="text-align: center; margin-top: 2rem; color: #666666; font-size: 0.9rem;">
+    <p>Try searching for: <strong>AAPL</strong>, <strong>TSLA</strong>, <strong>NVDA</strong>, <strong>GOOGL</strong></p>
+</div>
+""")
+
+_FOOTER_HTML = _compact_html("""
+<div style="text-align: center; padding: 2rem; margin-top: 3rem; color: #666666; font-size: 0.875rem; width: 100%;">
+    <p>This analysis is for informational purposes only. Always do your own research.</p>
+</div>
+""")
+
+
+@lru_cache(maxsize=256)
+def _metrics_html(current_price, target_price, pe_ratio, price_change, is_indian):
+    """Build the metrics row markup, memoized by the metric values"""
+    currency = "₹" if is_indian else "$"
+    
+    # Format values with appropriate currency; missing metrics show as N/A
+    current_price = DataProcessor.format_currency(current_price, currency)
+    target_price = DataProcessor.format_currency(target_price, currency)
+    pe_ratio = "N/A" if is_missing(pe_ratio) or pe_ratio <= 0 else f"{pe_ratio:.2f}"
+    if is_missing(price_change):
+        change_color = "#999999"
+        change_text = "N/A"
+    else:
+        change_color = "#4ade80" if price_change >= 0 else "#f87171"
+        change_text = f"{price_change:+.2f}%"
+    
+    return _compact_html(f"""
+    <div class="metrics-row">
+        <div class="metric-item">
+            <div class="metric-label">Current Price</div>
+            <div class="metric-value">{current_price}</div>
+        </div>
+        <div class="metric-item">
+            <div class="metric-label">Target Price</div>
+            <div class="metric-value">{target_price}</div>
+        </div>
+        <div class="metric-item">
+            <div class="metric-label">PE Ratio</div>
+            <div class="metric-value">{pe_ratio}</div>
+        </div>
+        <div class="metric-item">
+            <div class="metric-label">Change</div>
+            <div class="metric-value" style="color: {change_color};">{change_text}</div>
+        </div>
+    </div>
+    """)
+
+
+@lru_cache(maxsize=256)
+def _analysis_html(analysis):
+    """Wrap a report for rendering, memoized by content"""
+    # Collapse runs of blank lines; trailing double spaces are markdown line breaks and stay
+    body = re.sub(r'\n\s*\n(\s*\n)+', '\n\n', analysis.strip())
+    return f'<div class="analysis-content">\n\n{body}\n\n</div>'
+
+
+def static_report_page(ticker, stock_data, analysis_html, updated):
+    """Standalone HTML page with the look of render_metrics and render_analysis, served without Streamlit.
+
+    analysis_html is the report already converted from markdown; updated is
+    a human-readable time shown under the ticker.
+    """
+    if stock_data and stock_data.has_price:
+        metrics = _metrics_html(
+            stock_data.current_price,
+            stock_data.target_price,
+            stock_data.pe_ratio,
+            stock_data.price_change,
+            stock_data.is_indian
+        )
+    else:
+        metrics = '<div class="info-message">Market data unavailable. Analysis based on available information.</div>'
+    ticker = html_escape(ticker)
+    return (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f'<title>{ticker} · TRADEO</title>{_STYLE_TAG}</head>'
+        '<body class="stApp" style="margin: 0;"><div class="block-container"><div class="main-container">'
+        f'{_HEADER_HTML}<div class="metric-label">{ticker} · {html_escape(updated)}</div>'
+        f'{metrics}<div class="analysis-content">{analysis_html}</div>{_FOOTER_HTML}'
+        '</div></div></body></html>'
+    )
+
 
 class UIComponents:
     @staticmethod
     def apply_custom_css():
-        st.markdown("""
-            <style>
-            @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-            
-            .stApp {
-                background: linear-gradient(135deg, #0a0a0a 0%, #1a1a1a 100%);
-                color: #ffffff;
-                font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                overflow-x: hidden;
-            }
-            
-            /* Hide Streamlit elements */
-            #MainMenu {visibility: hidden;}
-            footer {visibility: hidden;}
-            header {visibility: hidden;}
-            .stDeployButton {display: none;}
-            
-            /* Custom scrollbar */
-            ::-webkit-scrollbar {
-                width: 6px;
-            }
-            
-            ::-webkit-scrollbar-track {
-                background: transparent;
-            }
-            
-            ::-webkit-scrollbar-thumb {
-                background: rgba(255, 255, 255, 0.2);
-                border-radius: 3px;
-            }
-            
-            ::-webkit-scrollbar-thumb:hover {
-                background: rgba(255, 255, 255, 0.3);
-            }
-            
-            /* Center everything on the page */
-            .block-container {
-                padding-top: 1rem !important;
-                padding-bottom: 2rem !important;
-                max-width: 100% !important;
-                display: flex !important;
-                flex-direction: column !important;
-                align-items: center !important;
-                justify-content: flex-start !important;
-                min-height: 100vh !important;
-            }
-            
-            /* Main container */
-            .main-container {
-                width: 100%;
-                max-width: 800px;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: center;
-                margin: 0 auto;
-                padding: 0 2rem;
-            }
-            
-            /* Title styling - minimal and elegant */
-            .app-title {
-                font-size: 4rem;
-                font-weight: 200;
-                color: #ffffff;
-                text-align: center;
-                margin-bottom: 0.5rem;
-                letter-spacing: -0.03em;
-                font-family: 'Inter', sans-serif;
-                width: 100%;
-                background: linear-gradient(135deg, #ffffff 0%, #cccccc 100%);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-            }
-            
-            .app-subtitle {
-                font-size: 1rem;
-                font-weight: 400;
-                color: #666666;
-                text-align: center;
-                margin-bottom: 3rem;
-                font-family: 'Inter', sans-serif;
-                width: 100%;
-            }
-            
-            /* Search container - smaller and more compact */
-            .search-wrapper {
-                width: 100%;
-                max-width: 500px;
-                position: relative;
-                margin-bottom: 2rem;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            
-            /* Input styling - clean and minimal */
-            .stTextInput {
-                width: 100% !important;
-            }
-            
-            .stTextInput > div {
-                width: 100% !important;
-            }
-            
-            .stTextInput > div > div {
-                width: 100% !important;
-            }
-            
-            .stTextInput > div > div > input {
-                background: linear-gradient(135deg, #141414 0%, #1a1a1a 100%) !important;
-                border: 1px solid #2a2a2a !important;
-                border-radius: 12px !important;
-                padding: 1rem 1.5rem !important;
-                font-size: 1rem !important;
-                color: #ffffff !important;
-                height: 48px !important;
-                font-family: 'Inter', sans-serif !important;
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
-                box-shadow: 0 2px 10px rgba(0, 0, 0, 0.3) !important;
-                width: 100% !important;
-                text-align: center !important;
-                font-weight: 400 !important;
-                backdrop-filter: blur(10px) !important;
-                text-indent: 0 !important;
-                box-sizing: border-box !important;
-            }
-            
-            .stTextInput > div > div > input::placeholder {
-                color: #6a6a6a !important;
-                font-family: 'Inter', sans-serif !important;
-                text-align: center !important;
-                font-weight: 400 !important;
-                padding-left: 0 !important;
-            }
-            
-            .stTextInput > div > div > input:focus {
-                border-color: #505050 !important;
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.5), 0 0 0 2px rgba(80, 80, 80, 0.3) !important;
-                outline: none !important;
-                text-align: center !important;
-                background: linear-gradient(135deg, #161616 0%, #1e1e1e 100%) !important;
-                transform: translateY(-2px) !important;
-            }
-            
-            /* Button styling - centered and minimal */
-            .stButton {
-                width: 100% !important;
-                display: flex !important;
-                justify-content: center !important;
-            }
-            
-            .stButton > button {
-                background: linear-gradient(135deg, #1a1a1a 0%, #252525 100%) !important;
-                color: #ffffff !important;
-                border: 1px solid #333333 !important;
-                border-radius: 12px !important;
-                padding: 0.9rem 2rem !important;
-                font-size: 1rem !important;
-                font-weight: 500 !important;
-                font-family: 'Inter', sans-serif !important;
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1) !important;
-                height: 48px !important;
-                margin-top: 1.5rem !important;
-                min-width: 140px !important;
-                box-shadow: 0 4px 16px rgba(0, 0, 0, 0.3) !important;
-                backdrop-filter: blur(10px) !important;
-            }
-            
-            .stButton > button:hover {
-                background: linear-gradient(135deg, #252525 0%, #303030 100%) !important;
-                border-color: #505050 !important;
-                transform: translateY(-2px) !important;
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.4) !important;
-            }
-            
-            /* Results container - centered */
-            .results-container {
-                width: 100%;
-                max-width: 800px;
-                margin: 2rem auto 0 auto;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            
-            /* Metrics styling - centered */
-            .metrics-row {
-                display: flex;
-                gap: 1rem;
-                margin: 2rem 0;
-                flex-wrap: wrap;
-                justify-content: center;
-                width: 100%;
-                max-width: 800px;
-            }
-            
-            .metric-item {
-                background-color: #141414;
-                border: 1px solid #2a2a2a;
-                border-radius: 12px;
-                padding: 1.2rem;
-                flex: 1;
-                min-width: 160px;
-                text-align: center;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-                transition: all 0.3s ease;
-            }
-            
-            .metric-item:hover {
-                border-color: #404040;
-                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.3);
-            }
-            
-            .metric-label {
-                color: #999999;
-                font-size: 0.875rem;
-                margin-bottom: 0.6rem;
-                font-weight: 500;
-            }
-            
-            .metric-value {
-                color: #ffffff;
-                font-size: 1.3rem;
-                font-weight: 600;
-            }
-            
-            /* Analysis container - beautiful and structured */
-            .analysis-content {
-                background: linear-gradient(135deg, #141414 0%, #1a1a1a 100%);
-                border: 1px solid #2a2a2a;
-                border-radius: 16px;
-                padding: 3rem;
-                margin: 2rem auto;
-                line-height: 1.8;
-                width: 100%;
-                max-width: 900px;
-                text-align: left;
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-                backdrop-filter: blur(10px);
-                overflow-y: visible;
-                max-height: none;
-            }
-            
-            .analysis-content h2 {
-                color: #ffffff;
-                margin-top: 2.5rem;
-                margin-bottom: 1.2rem;
-                font-weight: 600;
-                font-size: 1.4rem;
-                border-bottom: 2px solid #333333;
-                padding-bottom: 0.5rem;
-            }
-            
-            .analysis-content h2:first-child {
-                margin-top: 0;
-            }
-            
-            .analysis-content h3 {
-                color: #ffffff;
-                margin-top: 1.8rem;
-                margin-bottom: 0.8rem;
-                font-weight: 600;
-                font-size: 1.1rem;
-            }
-            
-            .analysis-content p, .analysis-content li {
-                color: #cccccc;
-                margin-bottom: 0.8rem;
-                font-size: 1rem;
-            }
-            
-            .analysis-content strong {
-                color: #ffffff;
-                font-weight: 600;
-            }
-            
-            .analysis-content ul, .analysis-content ol {
-                margin-left: 1.5rem;
-                margin-bottom: 1rem;
-            }
-            
-            .analysis-content li {
-                margin-bottom: 0.5rem;
-                padding-left: 0.5rem;
-            }
-            
-            /* Messages - centered */
-            .info-message {
-                background-color: #141414;
-                border: 1px solid #2a2a2a;
-                border-radius: 12px;
-                padding: 1.2rem;
-                color: #cccccc;
-                text-align: center;
-                margin: 1rem auto;
-                width: 100%;
-                max-width: 600px;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-            }
-            
-            .error-message {
-                background-color: #1a0f0f;
-                border: 1px solid #3a1a1a;
-                border-radius: 12px;
-                padding: 1.2rem;
-                color: #ff9999;
-                margin: 1rem auto;
-                width: 100%;
-                max-width: 600px;
-                text-align: center;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.2);
-            }
-            
-            /* Loading spinner */
-            .stSpinner > div {
-                border-color: #4a5568 transparent transparent transparent !important;
-            }
-            
-            /* Hide labels */
-            .stTextInput > label {
-                display: none !important;
-            }
-            
-            /* Ensure columns are centered */
-            .stColumns {
-                width: 100% !important;
-                display: flex !important;
-                justify-content: center !important;
-            }
-            
-            /* Center the entire app content */
-            .main .block-container {
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: flex-start;
-                min-height: 100vh;
-                padding-top: 2rem;
-            }
-            
-            /* Fix scrolling */
-            .main {
-                overflow-y: auto !important;
-                height: auto !important;
-            }
-            </style>
-        """, unsafe_allow_html=True)
+        """Inject the pre-minified stylesheet"""
+        st.markdown(_STYLE_TAG, unsafe_allow_html=True)
 
     @staticmethod
     def render_header():
         """Render the minimal and beautiful header"""
-        st.markdown("""
-        <div style="width: 100%; display: flex; flex-direction: column; align-items: center; margin-bottom: 2rem;">
-            <h1 class="app-title">tradeo</h1>
-            <p class="app-subtitle">intelligent stock analysis, simplified</p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_HEADER_HTML, unsafe_allow_html=True)
 
     @staticmethod
-    def render_search_section():
-        """Render the beautiful and minimal search section"""
+    def render_search_section(show_refresh=False):
+        """Render the search section; returns (ticker, analyze clicked, full report requested, refresh clicked)"""
         st.markdown('<div class="search-wrapper">', unsafe_allow_html=True)
         
         ticker = st.text_input(
             "Stock Ticker", 
-            placeholder="Enter any stock ticker (e.g., AAPL, TSLA, NVDA)...", 
+            placeholder="Enter a stock ticker (e.g., AAPL), or several to compare (e.g., RELIANCE, TCS, INFY)...", 
             key="ticker_input",
             label_visibility="collapsed"
         ).upper()
@@ -379,112 +535,126 @@ class UIComponents:
         if ticker.strip():
             col1, col2, col3 = st.columns([2, 1, 2])
             with col2:
-                analyze_button = st.button("✨ Analyze", use_container_width=True)
+                analyze_button = st.button("✨ Analyze", key="analyze", use_container_width=True)
+                # Quick look (metrics only) is the default; the full report is opt-in
+                full_report = st.toggle("Full report", key="full_report")
+                # Shown while the session holds results for this input; refetches them
+                refresh_button = show_refresh and st.button("↻ Refresh", key="refresh", use_container_width=True)
         else:
             analyze_button = False
+            full_report = False
+            refresh_button = False
             # Show some example suggestions when empty
-            st.markdown("""
-            <div style="text-align: center; margin-top: 2rem; color: #666666; font-size: 0.9rem;">
-                <p>Try searching for: <strong>AAPL</strong>, <strong>TSLA</strong>, <strong>NVDA</strong>, <strong>GOOGL</strong></p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_SUGGESTIONS_HTML, unsafe_allow_html=True)
         
         st.markdown('</div>', unsafe_allow_html=True)
-        return ticker, analyze_button
+        return ticker, analyze_button, full_report, refresh_button
 
     @staticmethod
-    def render_metrics(stock_data):
-        """Render metrics in a minimal style"""
-        if stock_data and stock_data['current_price'] > 0:
-            # Determine currency based on whether it's an Indian stock
-            is_indian = stock_data.get('is_indian', False)
-            currency = "₹" if is_indian else "$"
-            
-            # Format values with appropriate currency
-            current_price = DataProcessor.format_currency(stock_data['current_price'], currency)
-            target_price = DataProcessor.format_currency(stock_data['target_price'], currency) if stock_data['target_price'] > 0 else "N/A"
-            pe_ratio = f"{stock_data['pe_ratio']:.2f}" if stock_data['pe_ratio'] > 0 else "N/A"
-            price_change = stock_data['price_change']
-            change_color = "#4ade80" if price_change >= 0 else "#f87171"
-            change_text = f"{price_change:+.2f}%"
-            
-            st.markdown(f"""
-            <div class="metrics-row">
-                <div class="metric-item">
-                    <div class="metric-label">Current Price</div>
-                    <div class="metric-value">{current_price}</div>
-                </div>
-                <div class="metric-item">
-                    <div class="metric-label">Target Price</div>
-                    <div class="metric-value">{target_price}</div>
-                </div>
-                <div class="metric-item">
-                    <div class="metric-label">PE Ratio</div>
-                    <div class="metric-value">{pe_ratio}</div>
-                </div>
-                <div class="metric-item">
-                    <div class="metric-label">Change</div>
-                    <div class="metric-value" style="color: {change_color};">{change_text}</div>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            return True
+    def render_metrics(stock_data, history=None):
+        """Render metrics in a minimal style, followed by a price chart when history is given"""
+        if isinstance(stock_data, dict):
+            stock_data = StockData.from_dict(stock_data)
+        
+        if stock_data and stock_data.has_price:
+            html = _metrics_html(
+                stock_data.current_price,
+                stock_data.target_price,
+                stock_data.pe_ratio,
+                stock_data.price_change,
+                stock_data.is_indian
+            )
+            st.markdown(html, unsafe_allow_html=True)
+            rendered = True
         else:
             st.markdown('<div class="info-message">Market data unavailable. Analysis based on available information.</div>', unsafe_allow_html=True)
-            return False
+            rendered = False
+        
+        if history is not None:
+            UIComponents.render_price_chart(history, bool(stock_data and stock_data.is_indian))
+        return rendered
+
+    @staticmethod
+    def render_price_chart(history, is_indian=False):
+        """Render a (dates, closes) price series as a minimal line chart"""
+        import plotly.graph_objects as go  # Only loaded when a chart is shown
+        
+        dates, closes = history
+        currency = "₹" if is_indian else "$"
+        fig = go.Figure(go.Scattergl(
+            x=dates,
+            y=closes,
+            mode="lines",
+            line={"color": "#4ade80" if closes[-1] >= closes[0] else "#f87171", "width": 1.5},
+            hovertemplate=f"%{{x|%Y-%m-%d}}<br>{currency}%{{y:,.2f}}<extra></extra>"
+        ))
+        fig.update_layout(
+            height=320,
+            margin={"l": 0, "r": 0, "t": 10, "b": 0},
+            paper_bgcolor="rgba(0,0,0,0)",
+            plot_bgcolor="rgba(0,0,0,0)",
+            font={"color": "#999999", "family": "Inter, sans-serif"},
+            xaxis={"showgrid": False},
+            yaxis={"gridcolor": "#2a2a2a", "tickprefix": currency},
+            showlegend=False
+        )
+        st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
 
     @staticmethod
     def render_analysis(analysis):
         """Render analysis with beautiful formatting"""
-        # Apply custom CSS for beautiful content without boxes
-        st.markdown("""
-        <style>
-        .analysis-content {
-            color: #cccccc !important;
-            line-height: 1.8 !important;
-            max-width: 900px !important;
-            margin: 0 auto !important;
-            padding: 2rem 1rem !important;
-            word-wrap: break-word !important;
-            overflow-wrap: break-word !important;
-        }
-        .analysis-content h2 {
-            color: #ffffff !important;
-            margin-top: 3rem !important;
-            margin-bottom: 1.5rem !important;
-            font-weight: 600 !important;
-            font-size: 1.5rem !important;
-            border-bottom: 2px solid #333333 !important;
-            padding-bottom: 0.8rem !important;
-        }
-        .analysis-content h2:first-child {
-            margin-top: 1rem !important;
-        }
-        .analysis-content p, .analysis-content li {
-            color: #cccccc !important;
-            margin-bottom: 1rem !important;
-            font-size: 1rem !important;
-            line-height: 1.8 !important;
-            word-wrap: break-word !important;
-            overflow-wrap: break-word !important;
-            hyphens: auto !important;
-        }
-        .analysis-content strong {
-            color: #ffffff !important;
-            font-weight: 600 !important;
-        }
-        .analysis-content ul, .analysis-content ol {
-            margin-left: 2rem !important;
-            margin-bottom: 1.5rem !important;
-        }
-        .analysis-content li {
-            margin-bottom: 0.8rem !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        # Styles ship with apply_custom_css; the wrapped report is memoized by content hash
+        st.markdown(_analysis_html(analysis), unsafe_allow_html=True)
+
+    @staticmethod
+    def render_comparison(report, metrics):
+        """Render one metrics row per compared ticker followed by the side-by-side report"""
+        for ticker, stock_data in metrics.items():
+            st.markdown(f'<div class="metric-label">{ticker}</div>', unsafe_allow_html=True)
+            UIComponents.render_metrics(stock_data)
+        UIComponents.render_analysis(report)
+
+    @staticmethod
+    def render_screener(snapshot):
+        """Render the screener over the cached metrics snapshot"""
+        if not len(snapshot):
+            return
         
-        # Render the content without box styling
-        st.markdown(f'<div class="analysis-content">\n\n{analysis}\n\n</div>', unsafe_allow_html=True)
+        with st.expander(f"🔎 Screener ({len(snapshot)} tickers)"):
+            expression = st.text_input(
+                "Filter",
+                placeholder="e.g. pe < 20 and upside > 15",
+                key="screener_filter"
+            )
+            sort_by = st.selectbox(
+                "Sort by",
+                ["-upside", "movers", "-price_change", "price_change", "pe", "-pe"],
+                key="screener_sort"
+            )
+            try:
+                rows = snapshot.screen(expression, sort_by=sort_by, limit=100)
+            except ValueError as e:
+                UIComponents.render_warning(str(e))
+                return
+            
+            if rows:
+                st.dataframe(
+                    [{key: value for key, value in row.items() if key != 'updated_at'} for row in rows],
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                UIComponents.render_warning("No tickers match this screen.")
+
+    @staticmethod
+    def render_key_usage(key_stats):
+        """Render per-key API usage and health of the key pool"""
+        with st.expander(f"🔑 API keys ({len(key_stats)})"):
+            st.dataframe(
+                [{'key': label, **usage} for label, usage in key_stats.items()],
+                use_container_width=True,
+                hide_index=True
+            )
 
     @staticmethod
     def render_error(ticker, error_message):
@@ -514,8 +684,4 @@ class UIComponents:
     @staticmethod
     def render_footer():
         """Render minimal footer"""
-        st.markdown("""
-        <div style="text-align: center; padding: 2rem; margin-top: 3rem; color: #666666; font-size: 0.875rem; width: 100%;">
-            <p>This analysis is for informational purposes only. Always do your own research.</p>
-        </div>
-        """, unsafe_allow_html=True) 
\ No newline at end of file
+        st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
@@ -1,5 +1,6 @@
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple
+from instruments import resolve_ticker
 
 class DataProcessor:
     """Utility class for processing stock data and news content"""
@@ -101,74 +102,53 @@ class DataProcessor:
     
     @staticmethod
     def validate_ticker(ticker: str) -> Tuple[bool, str]:
-        """Validate stock ticker format"""
-        if not ticker:
-            return False, "Ticker cannot be empty"
-        
-        # Remove whitespace and convert to uppercase
-        ticker = ticker.strip().upper()
-        
-        # Basic validation - alphanumeric with optional dots and hyphens
-        if not re.match(r'^[A-Z0-9.-]+$', ticker):
-            return False, "Ticker contains invalid characters"
-        
-        if len(ticker) < 1 or len(ticker) > 10:
-            return False, "Ticker length should be between 1-10 characters"
-        
-        return True, ticker
+        """Validate stock ticker format; returns (is_valid, canonical instrument ID or error message)"""
+        return resolve_ticker(ticker)
     
     @staticmethod
-    def format_currency(amount: float, currency: str = "$") -> str:
+    def format_currency(amount: Optional[float], currency: str = "$") -> str:
         """Format currency amount showing exact prices with comma separation"""
-        if amount == 0:
+        # None, NaN and the legacy 0 sentinel all mean the price is missing
+        if not amount or amount != amount:
             return "N/A"
         
         # Show exact amount with comma thousand separators for both currencies
         return f"{currency}{amount:,.2f}"
     
     @staticmethod
-    def create_news_summary(news_items: List[Dict], max_items: int = 5) -> Tuple[str, List[Dict]]:
-        """Create formatted news summary with references"""
-        if not news_items:
-            return "No recent news found.", []
-        
-        news_summary = ""
-        references = []
-        
-        for idx, item in enumerate(news_items[:max_items], 1):
-            title = DataProcessor.clean_and_truncate_text(item.get('title', 'No title'), 100)
-            content = DataProcessor.clean_and_truncate_text(item.get('content', 'No content'), 300)
-            url = item.get('url', '#')
-            
-            news_summary += f"{idx}. {title}: {content} [Ref: {url}]\n"
-            references.append({
-                'index': idx, 
-                'url': url, 
-                'title': title
-            })
-        
-        return news_summary, references
+    def create_news_summary(news_items: Iterable[Dict], max_items: int = 5) -> Tuple[str, List[Dict]]:
+        """Create formatted news summary with references, skipping near-duplicate stories"""
+        from news_digest import build_news_digest  # Imports utils itself
+        return build_news_digest(news_items or (), max_items)
 
 class CacheManager:
-    """Simple cache manager for API responses"""
+    """Cache manager for API responses on a pluggable backend (see cache_backends.py)"""
     
-    def __init__(self, max_size: int = 100):
-        self.cache = {}
+    def __init__(self, max_size: int = 100, backend=None):
         self.max_size = max_size
+        if backend is None:
+            # Deferred: cache_backends pulls in numpy through stock_data
+            from cache_backends import InProcessBackend
+            backend = InProcessBackend(max_size)
+        self.backend = backend
+    
+    @property
+    def shared(self) -> bool:
+        """Whether entries are visible to other processes/replicas"""
+        return self.backend.shared
     
     def get(self, key: str) -> Optional[any]:
         """Get cached value"""
-        return self.cache.get(key)
+        return self.backend.get(key)
     
-    def set(self, key: str, value: any) -> None:
-        """Set cached value"""
-        if len(self.cache) >= self.max_size:
-            # Remove oldest entry
-            oldest_key = next(iter(self.cache))
-            del self.cache[oldest_key]
-        
-        self.cache[key] = value
+    def set(self, key: str, value: any, ttl: Optional[float] = None) -> None:
+        """Set cached value, expiring after ttl seconds when given"""
+        self.backend.set(key, value, ttl)
+    
+    def delete(self, key: str) -> None:
+        """Remove a cached value"""
+        self.backend.delete(key)
     
     def clear(self) -> None:
         """Clear all cached values"""
-        self.cache.clear() 
\ No newline at end of file
+        self.backend.clear()
@@ -0,0 +1,171 @@
+"""Background watcher that polls metrics cheaply and re-analyzes only on material moves.
+
+Usage: python watcher.py RELIANCE TCS AAPL [--once]
+"""
+import datetime
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from instruments import resolve_ticker
+from trading_calendar import exchange_for
+
+
+class WatchState:
+    """Per-symbol polling state"""
+
+    __slots__ = ('ticker', 'exchange', 'last_price', 'last_polled', 'volatility',
+                 'report_price', 'report_change', 'next_poll')
+
+    def __init__(self, ticker: str, is_indian: bool):
+        self.ticker = ticker
+        self.exchange = exchange_for(is_indian)
+        self.last_price = None
+        self.last_polled = None
+        # Smoothed absolute percent move per sqrt(minute) between polls
+        self.volatility = None
+        self.report_price = None
+        self.report_change = None
+        self.next_poll = 0.0
+
+
+class Watcher:
+    """Poll a watchlist with fetch_stock_metrics and trigger reports only on material moves.
+
+    Each symbol's polling interval is chosen so that its expected move
+    between polls is a quarter of the price threshold, clamped to the
+    configured bounds; outside market hours a symbol is next polled when
+    its exchange reopens.
+    """
+
+    def __init__(self, analyzer, tickers: Iterable[str], price_threshold: Optional[float] = None,
+                 change_threshold: Optional[float] = None):
+        config = analyzer.config
+        self.analyzer = analyzer
+        self.calendar = analyzer.calendar
+        self.price_threshold = config.watch_price_threshold if price_threshold is None else price_threshold
+        self.change_threshold = config.watch_change_threshold if change_threshold is None else change_threshold
+        self.min_interval = config.watch_min_interval
+        self.max_interval = config.watch_max_interval
+        self.states = {}
+        for ticker in tickers:
+            is_valid, result = resolve_ticker(ticker)
+            if is_valid:
+                self.states[result] = WatchState(result, analyzer._is_indian_stock(result))
+        self.stats = {'polls': 0, 'reports': 0, 'failed_polls': 0}
+        self._stop = threading.Event()
+
+    def _interval(self, state: WatchState, now: float, failed: bool = False) -> float:
+        """Seconds until the next poll of a symbol; a failed poll is retried soon, but not before the open"""
+        moment = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+        if not self.calendar.is_open(state.exchange, moment):
+            return max(self.min_interval, self.calendar.seconds_until_open(state.exchange, moment))
+        if failed or state.volatility is None:
+            return self.min_interval
+        # Expected move over t minutes is volatility * sqrt(t); a flat symbol backs off to max_interval
+        minutes = (self.price_threshold / 4 / max(state.volatility, 1e-6)) ** 2
+        return min(self.max_interval, max(self.min_interval, minutes * 60))
+
+    def _is_material(self, state: WatchState, stock_data) -> bool:
+        """Whether metrics moved past a threshold since the last report"""
+        if state.report_price is None:
+            return True
+        price_move = abs(stock_data.current_price - state.report_price) / state.report_price * 100
+        if price_move >= self.price_threshold:
+            return True
+        change = stock_data.get('price_change')
+        return (change is not None and state.report_change is not None
+                and abs(change - state.report_change) >= self.change_threshold)
+
+    def poll(self, state: WatchState, now: Optional[float] = None) -> bool:
+        """Poll one symbol and trigger a report if it moved materially; returns whether one was generated"""
+        now = time.time() if now is None else now
+        stock_data, _ = self.analyzer.get_stock_data(state.ticker, refresh=True)
+        self.stats['polls'] += 1
+        if stock_data is None or not stock_data.has_price:
+            self.stats['failed_polls'] += 1
+            state.next_poll = now + self._interval(state, now, failed=True)
+            return False
+
+        price = stock_data.current_price
+        if state.last_price and state.last_polled and now > state.last_polled:
+            elapsed_minutes = (now - state.last_polled) / 60
+            move = abs(math.log(price / state.last_price)) * 100 / math.sqrt(elapsed_minutes)
+            state.volatility = move if state.volatility is None else 0.3 * move + 0.7 * state.volatility
+        state.last_price = price
+        state.last_polled = now
+
+        if state.report_price is None:
+            # A report still fresh from before this watcher started is the
+            # baseline, so restarts do not regenerate every report
+            cached = self.analyzer.cached_report(state.ticker)
+            if cached and self.analyzer.report_is_fresh(state.ticker, cached[0]):
+                state.report_price = price
+                state.report_change = stock_data.get('price_change')
+
+        triggered = False
+        if self._is_material(state, stock_data):
+            analysis = self.analyzer.get_report(state.ticker, refresh=True)
+            if not self.analyzer.is_error_report(analysis):
+                state.report_price = price
+                state.report_change = stock_data.get('price_change')
+                self.stats['reports'] += 1
+                triggered = True
+
+        state.next_poll = now + self._interval(state, now)
+        return triggered
+
+    def run_once(self, now: Optional[float] = None) -> Dict[str, bool]:
+        """Poll every symbol that is due; returns {ticker: report generated}"""
+        now = time.time() if now is None else now
+        return {
+            ticker: self.poll(state, now)
+            for ticker, state in self.states.items()
+            if state.next_poll <= now
+        }
+
+    def run_forever(self) -> None:
+        """Poll symbols as they become due until stop() is called"""
+        while not self._stop.is_set() and self.states:
+            next_poll, ticker = min((state.next_poll, ticker) for ticker, state in self.states.items())
+            if self._stop.wait(max(0.0, next_poll - time.time())):
+                break
+            if self.poll(self.states[ticker]):
+                print(f"{datetime.datetime.now():%H:%M:%S} {ticker}: new report at {self.states[ticker].report_price}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from analyzer import StockSentimentAnalyzer
+    from config import get_config
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--price-threshold", type=float)
+    parser.add_argument("--change-threshold", type=float)
+    parser.add_argument("--once", action="store_true", help="Poll every symbol once and exit")
+    args = parser.parse_args()
+
+    config = get_config()
+    watcher = Watcher(
+        StockSentimentAnalyzer(config.perplexity_api_key),
+        args.tickers,
+        price_threshold=args.price_threshold,
+        change_threshold=args.change_threshold,
+    )
+    try:
+        if args.once:
+            for ticker, triggered in watcher.run_once().items():
+                print(f"{ticker}: {'new report' if triggered else 'no material move'}")
+        else:
+            watcher.run_forever()
+    except KeyboardInterrupt:
+        watcher.stop()
+    print(watcher.stats)
+    for label, usage in watcher.analyzer.key_pool.stats().items():
+        print(f"{label}: {usage}")